@@ -1,9 +1,28 @@
 import streamlit as st
-from core.read import read_repo_data
-from core.chunks import chunk_text
-from utils.utils import save_chunks_jsonl, load_chunks_jsonl, list_chunks
-from core.search import create_text_index, create_vector_index, load_embedding_model
-from core.agent import create_agent, run_agent
+from core.read import iter_repo_documents
+from core.chunks import chunk_corpus
+from core.dedup import deduplicate_chunks
+from utils.utils import (
+    save_chunks_store,
+    load_chunks,
+    list_chunks,
+    sync_catalog,
+    save_embeddings,
+    load_embeddings,
+    save_text_index,
+    load_text_index,
+    save_ann_index,
+    load_ann_index,
+)
+from core.search import (
+    create_text_index,
+    create_vector_index,
+    embed_chunks,
+    load_embedding_model,
+    embedding_model_key,
+    DEFAULT_EMBEDDING_MODEL,
+)
+from core.embedding_cache import EmbeddingCache
 from core.agent_tools import make_agent_tools
 
 st.set_page_config(page_title="🤖 AI Agent Crashcourse", layout="wide")
@@ -17,30 +36,45 @@ if "ready" not in st.session_state:
 if "history" not in st.session_state:
     st.session_state.history = []
 
+# Vectors from the int8 backend are cached and saved under their own key.
+MODEL_KEY = embedding_model_key(DEFAULT_EMBEDDING_MODEL)
+
 # --- Cache layers ---
 @st.cache_data(show_spinner=False)
-def load_and_chunk_repo(owner, repo, branch, strategy, level, size, step):
-    docs = read_repo_data(owner, repo, branch=branch)
-    all_chunks = []
-    for doc in docs:
-        if strategy == "section":
-            doc_chunks = chunk_text(doc.get("content", ""), method="section", level=level)
-        else:
-            doc_chunks = chunk_text(doc.get("content", ""), method=strategy, size=size, step=step)
-        for c in doc_chunks:
-            c.update({"filename": doc.get("filename")})
-        all_chunks.extend(doc_chunks)
-    return all_chunks
+def load_and_chunk_repo(owner, repo, branch, strategy, level, size, step, dedup=False, min_size=200):
+    docs = iter_repo_documents(owner, repo, branch=branch)
+    # Chunk in-process rather than starting a process per core inside the Streamlit server.
+    chunks = chunk_corpus(docs, method=strategy, size=size, step=step, level=level, min_size=min_size, workers=1)
+    return deduplicate_chunks(chunks) if dedup else chunks
+
+@st.cache_resource(show_spinner=False)
+def get_embedding_model():
+    return load_embedding_model(DEFAULT_EMBEDDING_MODEL)
 
+# chunks_path is part of the cache key: the same chunks saved under a new path must
+# still get their text and IVF indexes written next to that file.
 @st.cache_resource(show_spinner=False)
-def build_indexes(all_chunks):
-    text_index = create_text_index(all_chunks)
-    embedding_model = load_embedding_model()
-    vector_index = create_vector_index(all_chunks, embedding_model)
+def build_indexes(all_chunks, _embeddings=None, chunks_path=None, index_type="exact"):
+    text_index = load_text_index(chunks_path, all_chunks) if chunks_path else None
+    if text_index is None:
+        text_index = create_text_index(all_chunks)
+        if chunks_path:
+            save_text_index(text_index, chunks_path)
+    embedding_model = get_embedding_model()
+    vector_index = None
+    if index_type == "ivf" and chunks_path:
+        vector_index = load_ann_index(chunks_path, _embeddings, all_chunks, MODEL_KEY)
+    if vector_index is None:
+        vector_index = create_vector_index(all_chunks, embedding_model, embeddings=_embeddings, index_type=index_type)
+        if index_type == "ivf" and chunks_path:
+            save_ann_index(vector_index, chunks_path, MODEL_KEY)
     return text_index, vector_index, embedding_model
 
 @st.cache_resource(show_spinner=False)
 def build_agent(_text_index, _vector_index, _embedding_model):
+    # pydantic_ai is imported on first Init, not at app startup (as in the CLI).
+    from core.agent import create_agent
+
     tools = make_agent_tools(_text_index, _vector_index, _embedding_model)
     return create_agent(
         prompt_file_path="prompts/system_prompt.yml",
@@ -75,21 +109,34 @@ repo = st.sidebar.text_input("Repo name", "Python")
 branch = st.sidebar.text_input("Branch", "master")
 
 st.sidebar.header("📄 Chunking")
-strategy = st.sidebar.selectbox("Chunking strategy", ["simple", "sliding", "paragraph", "section"])
-level = st.sidebar.number_input("Markdown header level (section)", 1, 6, 2)
+strategy = st.sidebar.selectbox("Chunking strategy", ["simple", "sliding", "paragraph", "section", "tokens", "recursive"])
+level = st.sidebar.number_input("Markdown header level (section/recursive)", 1, 6, 2)
 size = st.sidebar.number_input("Chunk size", 50, 5000, 1000, step=50)
-step = st.sidebar.number_input("Chunk step (for sliding)", 10, 5000, 500, step=10)
+step = st.sidebar.number_input("Chunk step (for sliding/tokens/recursive)", 10, 5000, 500, step=10)
+min_size = st.sidebar.number_input("Minimum chunk size (recursive)", 0, 5000, 200, step=50)
 
 st.sidebar.header("🛠️ Advanced")
 save_chunks = st.sidebar.checkbox("Save chunks to disk", value=False)
+dedup = st.sidebar.checkbox("Remove duplicate chunks", value=False)
+batch_size = st.sidebar.number_input("Embedding batch size", 1, 512, 32)
+index_type = st.sidebar.selectbox("Vector index", ["exact", "ivf"],
+                                  help="IVF is approximate and much faster on very large corpora")
 mode = st.sidebar.radio("Mode", ["Generate new chunks", "Load existing chunks"])
 
-chunks_files = list_chunks()
+if mode == "Load existing chunks" and st.sidebar.button("🔄 Refresh snapshots",
+                                                       help="Pick up chunk files saved outside the catalog"):
+    sync_catalog()
+
+chunks_files = {c["meta"]["id"]: c for c in list_chunks()}
 chunks_choice = None
 if mode == "Load existing chunks" and chunks_files:
-    labels = [f"{c['meta']['owner']}/{c['meta']['repo']} ({c['meta']['strategy']})" for c in chunks_files]
+    labels = {
+        snapshot_id: f"{c['meta']['owner']}/{c['meta']['repo']}@{c['meta']['branch']} "
+                     f"({c['meta']['strategy']}, {c['meta']['chunk_count']} chunks, {c['meta']['created_at']})"
+        for snapshot_id, c in chunks_files.items()
+    }
     chunks_choice = st.sidebar.selectbox(
-        "Select chunks file", range(len(chunks_files)), format_func=lambda i: labels[i]
+        "Select chunks file", list(chunks_files), format_func=lambda i: labels[i]
     )
 
 st.sidebar.divider()
@@ -99,23 +146,47 @@ if init_clicked:
     log = st.container()
     with st.spinner("Initializing agent..."):
         log.write("📥 Reading and chunking repository...")
+        save_path, embeddings = None, None
         if mode == "Generate new chunks":
-            all_chunks = load_and_chunk_repo(owner, repo, branch, strategy, level, size, step)
+            all_chunks = load_and_chunk_repo(owner, repo, branch, strategy, level, size, step, dedup, min_size)
             if save_chunks:
-                save_path = save_chunks_jsonl(all_chunks, owner, repo, branch, strategy)
+                params = {"size": size, "step": step, "level": level, "min_size": min_size, "dedup": dedup}
+                save_path = save_chunks_store(all_chunks, owner, repo, branch, strategy, params=params)
                 log.write(f"💾 Saved chunks to `{save_path}`")
             else:
                 log.write("ℹ️ Chunks not saved to disk.")
         elif mode == "Load existing chunks" and chunks_choice is not None:
-            chunks_path = list_chunks()[chunks_choice]["path"]
-            all_chunks = load_chunks_jsonl(chunks_path)
-            log.write(f"📂 Loaded existing chunks from `{chunks_path}`")
+            save_path = chunks_files[chunks_choice]["path"]
+            all_chunks = load_chunks(save_path)
+            log.write(f"📂 Loaded existing chunks from `{save_path}`")
+            embeddings = load_embeddings(save_path, MODEL_KEY, count=len(all_chunks))
+            if embeddings is not None:
+                log.write("⚡ Using saved embeddings (no re-encoding)")
         else:
             st.error("No chunks available.")
             st.stop()
 
+        embeddings_loaded = embeddings is not None
+        if not embeddings_loaded:
+            # Embedded outside the cached build_indexes so progress can be reported;
+            # the embedding cache keeps repeated inits cheap.
+            bar = log.progress(0.0, text="🧮 Embedding chunks...")
+            embeddings = embed_chunks(
+                all_chunks,
+                get_embedding_model(),
+                cache=EmbeddingCache(MODEL_KEY),
+                batch_size=batch_size,
+                progress=lambda done, total: bar.progress(done / total, text=f"🧮 Embedded {done}/{total} new chunks"),
+            )
+            bar.progress(1.0, text=f"🧮 Embedded {len(all_chunks)} chunks")
+
+        if save_path is not None and not embeddings_loaded:
+            # Before building indexes: a saved IVF index records which embeddings it was built from.
+            save_embeddings(embeddings, save_path, MODEL_KEY)
+            log.write("💾 Saved embeddings next to the chunks")
+
         log.write("🔍 Building indexes...")
-        text_index, vector_index, embedding_model = build_indexes(all_chunks)
+        text_index, vector_index, embedding_model = build_indexes(all_chunks, embeddings, save_path, index_type)
 
         log.write("🧩 Creating agent...")
         agent = build_agent(text_index, vector_index, embedding_model)
@@ -135,6 +206,8 @@ if st.session_state.ready:
 
     if submitted and user_query.strip():
         with st.spinner("Thinking..."):
+            from core.agent import run_agent
+
             result = run_agent(st.session_state.agent, user_query.strip())
             answer = getattr(result, "output", None) or str(result)
 
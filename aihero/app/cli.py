@@ -1,63 +1,282 @@
 import argparse
-from core.read import read_repo_data
-from core.chunks import chunk_text
-from utils.utils import save_chunks_jsonl
-from core.search import create_text_index, create_vector_index, load_embedding_model
-from core.agent import create_agent, run_agent
+import json
+import tempfile
+from core.read import iter_repo_documents, iter_local_documents, ARCHIVE_CACHE_DIR
+from core.chunks import chunk_corpus
+from utils.utils import (
+    DATA_DIR,
+    CATALOG_PATH,
+    save_chunks_jsonl,
+    save_chunks_store,
+    load_chunks,
+    save_embeddings,
+    load_embeddings,
+    save_text_index,
+    load_text_index,
+    save_ann_index,
+    load_ann_index,
+    list_chunks,
+    sync_catalog,
+)
+from utils.catalog import get_snapshot
+from core.search import (
+    create_text_index,
+    create_vector_index,
+    load_embedding_model,
+    embedding_model_key,
+    check_backend_parity,
+    DEFAULT_EMBEDDING_MODEL,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BACKENDS,
+    VECTOR_INDEX_TYPES,
+)
+from core.embedding_cache import EmbeddingCache, QueryEmbeddingCache
+from core.incremental import incremental_ingest
+from core.ingest import ingest_repositories
+from core.dedup import duplicate_groups, deduplicate_chunks
 from core.agent_tools import make_agent_tools
 from yaspin import yaspin
 from rich.console import Console
 from rich.markdown import Markdown
+from rich.table import Table
 
 console = Console()
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="AI Agent CLI pipeline")
-    parser.add_argument("--owner", required=True, help="Repository owner")
-    parser.add_argument("--repo", required=True, help="Repository name")
+    parser.add_argument("--owner", help="Repository owner")
+    parser.add_argument("--repo", help="Repository name")
     parser.add_argument("--branch", default="main", help="Branch (default: main)")
-    parser.add_argument("--method", choices=["simple", "sliding", "paragraph", "section"], default="section")
-    parser.add_argument("--size", type=int, default=1000, help="Chunk size")
-    parser.add_argument("--step", type=int, default=500, help="Step size (for sliding)")
-    parser.add_argument("--level", type=int, default=2, help="Markdown header level (for section)")
+    parser.add_argument("--method", choices=["simple", "sliding", "paragraph", "section", "tokens", "recursive"],
+                        default="section")
+    parser.add_argument("--size", type=int, default=1000,
+                        help="Chunk size (characters; model tokens for tokens; maximum for recursive)")
+    parser.add_argument("--step", type=int, default=500, help="Step size (for sliding/tokens/recursive)")
+    parser.add_argument("--level", type=int, default=2, help="Markdown header level (for section/recursive)")
+    parser.add_argument("--min-size", type=int, default=200, help="Minimum chunk size (for recursive)")
     parser.add_argument("--save-json", nargs="?", const=True, default=False,
                         help="Save chunks to JSONL (default: False). If string provided, use as filename.")
-    return parser.parse_args()
+    parser.add_argument("--compress", choices=["gzip", "zstd"],
+                        help="Compress the --save-json output (zstd needs the zstandard package)")
+    parser.add_argument("--save-store", action="store_true",
+                        help="Save chunks to a memory-mappable binary store (data/*.chunks)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the local archive cache and download the repository again")
+    parser.add_argument("--no-embedding-cache", action="store_true",
+                        help="Encode every chunk instead of reusing vectors from the embedding cache")
+    parser.add_argument("--batch-size", type=int, default=32, help="Texts per embedding batch (default: 32)")
+    parser.add_argument("--max-batch-tokens", type=int,
+                        help="Cap on padded tokens per embedding batch, bounding peak memory")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS, default=EMBEDDING_BACKEND,
+                        help="Embedding inference backend; onnx-int8 is fastest on CPU (default: torch)")
+    parser.add_argument("--check-parity", action="store_true",
+                        help="Compare --embedding-backend embeddings with torch on a sample of chunks")
+    parser.add_argument("--vector-index", choices=VECTOR_INDEX_TYPES, default="exact",
+                        help="Vector index: exact brute force, or approximate IVF for large corpora (default: exact)")
+    parser.add_argument("--n-lists", type=int,
+                        help="IVF inverted lists (default: ~sqrt(number of chunks))")
+    parser.add_argument("--nprobe", type=int, default=16,
+                        help="IVF lists scanned per query; higher is more accurate and slower (default: 16)")
+    parser.add_argument("--embed-workers", type=int, default=1,
+                        help="Processes used to embed chunks, each with its own model copy (default: 1)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes used to parse and chunk Markdown files (default: 1)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-chunk and re-embed files changed since the previous incremental run")
+    parser.add_argument("--repos", nargs="+", metavar="OWNER/REPO[@BRANCH]",
+                        help="Ingest several repositories concurrently into one corpus (instead of --owner/--repo)")
+    parser.add_argument("--max-connections", type=int, default=8,
+                        help="Concurrent downloads when using --repos (default: 8)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Drop exact and near-duplicate chunks before indexing")
+    parser.add_argument("--local-path",
+                        help="Read Markdown files from a local checkout instead of downloading the archive")
+    parser.add_argument("--list-snapshots", action="store_true",
+                        help="List saved chunk snapshots (filtered by --owner/--repo if given) and exit")
+    parser.add_argument("--refresh-catalog", action="store_true",
+                        help="Re-scan data/ for chunk files missing from the snapshot catalog and drop rows "
+                             "whose file is gone")
+    parser.add_argument("--snapshot", type=int,
+                        help="Load a saved chunk snapshot by catalog id instead of reading a repository")
+    args = parser.parse_args()
+    if args.nprobe < 1 or (args.n_lists is not None and args.n_lists < 1):
+        parser.error("--nprobe and --n-lists must be positive")
+    if args.list_snapshots or args.snapshot is not None:
+        return args
+    if args.refresh_catalog and not args.repos and not (args.owner and args.repo):
+        return args
+    if not args.repos and not (args.owner and args.repo):
+        parser.error("either --owner and --repo, --repos, or --snapshot is required")
+    if args.repos and args.local_path:
+        parser.error("--local-path is not supported with --repos")
+    if args.repos and args.incremental:
+        parser.error("--incremental is not supported with --repos")
+    return args
+
+
+def ingest(args, embedding_model):
+    """Read, chunk and optionally deduplicate the corpus selected on the command line."""
+    embeddings = None
+    if args.repos:
+        console.print(f"📥 Reading [bold green]{len(args.repos)}[/bold green] repos concurrently...")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            all_chunks = ingest_repositories(args.repos, method=args.method, size=args.size,
+                                             step=args.step, level=args.level, min_size=args.min_size,
+                                             cache_dir=tmp_dir if args.no_cache else ARCHIVE_CACHE_DIR,
+                                             max_connections=args.max_connections,
+                                             workers=args.workers)
+        owner, repo, branch = "multi", f"{len(args.repos)}repos", "mixed"
+    else:
+        if args.local_path:
+            console.print(f"📂 Reading local checkout [bold green]{args.local_path}[/bold green]...")
+            docs = iter_local_documents(args.local_path)
+        else:
+            console.print(f"📥 Reading repo [bold green]{args.owner}/{args.repo}@{args.branch}[/bold green]...")
+            cache_dir = None if args.no_cache else ARCHIVE_CACHE_DIR
+            docs = iter_repo_documents(args.owner, args.repo, branch=args.branch, cache_dir=cache_dir,
+                                       workers=args.workers)
+        if args.incremental:
+            model_key = embedding_model_key(DEFAULT_EMBEDDING_MODEL, args.embedding_backend)
+            state_dir = DATA_DIR / "state" / f"{args.owner.lower()}_{args.repo.lower()}_{args.branch.lower()}_{args.method}"
+            cache = None if args.no_embedding_cache else EmbeddingCache(model_key)
+            with yaspin(text="Embedding changed files...", color="cyan") as spinner:
+                def report(done, total):
+                    spinner.text = f"Embedded {done}/{total} new chunks"
+
+                all_chunks, embeddings, diff = incremental_ingest(
+                    docs, state_dir, embedding_model, method=args.method, size=args.size, step=args.step,
+                    level=args.level, min_size=args.min_size, model_name=model_key, cache=cache,
+                    batch_size=args.batch_size, max_batch_tokens=args.max_batch_tokens, progress=report,
+                    workers=args.embed_workers, backend=args.embedding_backend,
+                )
+                spinner.ok("✅")
+            console.print(f"♻️ {len(diff['added'])} added, {len(diff['modified'])} modified, "
+                          f"{len(diff['deleted'])} deleted, {len(diff['unchanged'])} unchanged files")
+        else:
+            all_chunks = chunk_corpus(docs, method=args.method, size=args.size,
+                                      step=args.step, level=args.level, workers=args.workers,
+                                      min_size=args.min_size)
+        owner, repo, branch = args.owner, args.repo, args.branch
+
+    if args.dedup:
+        groups = duplicate_groups(all_chunks)
+        if embeddings is not None:
+            embeddings = embeddings[[g[0] for g in groups]]
+        console.print(f"🧹 Removed {len(all_chunks) - len(groups)} duplicate chunks")
+        all_chunks = deduplicate_chunks(all_chunks, groups=groups)
+
+    return all_chunks, embeddings, (owner, repo, branch)
+
+
+def print_snapshots(args):
+    """Print the snapshot catalog as a table."""
+    filters = {k: v for k, v in {"owner": args.owner, "repo": args.repo}.items() if v}
+    table = Table(title="Chunk snapshots")
+    for column in ("id", "created", "source", "strategy", "params", "chunks", "embeddings", "index", "ivf"):
+        table.add_column(column)
+    for c in list_chunks(**filters):
+        meta = c["meta"]
+        table.add_row(str(meta["id"]), meta["created_at"], f"{meta['owner']}/{meta['repo']}@{meta['branch']}",
+                      meta["strategy"], json.dumps(meta["params"]), str(meta["chunk_count"]),
+                      "✅" if meta["embeddings_path"] else "-", "✅" if meta["text_index_path"] else "-",
+                      "✅" if meta["ann_index_path"] else "-")
+    console.print(table)
 
 
 def main():
     args = parse_args()
 
-    # Step 1. Load repo + chunk
-    console.print(f"📥 Reading repo [bold green]{args.owner}/{args.repo}@{args.branch}[/bold green]...")
-    docs = read_repo_data(args.owner, args.repo, branch=args.branch)
+    if args.refresh_catalog:
+        sync_catalog()
+        console.print("🔄 Snapshot catalog refreshed")
+    if args.list_snapshots:
+        print_snapshots(args)
+        return
+    if args.snapshot is None and not args.repos and not (args.owner and args.repo):
+        return
 
-    all_chunks = []
-    for doc in docs:
-        if args.method == "section":
-            doc_chunks = chunk_text(doc.get("content", ""), method="section", level=args.level)
-        else:
-            doc_chunks = chunk_text(doc.get("content", ""), method=args.method,
-                                    size=args.size, step=args.step)
-        for c in doc_chunks:
-            c.update({"filename": doc.get("filename")})
-        all_chunks.extend(doc_chunks)
-
-    if args.save_json:
-        path = save_chunks_jsonl(all_chunks, args.owner, args.repo, args.branch, args.method)
-        console.print(f"✅ Chunks saved to [yellow]{path}[/yellow]")
+    # Step 1. Load snapshot, or repo + chunk
+    embedding_model = load_embedding_model(DEFAULT_EMBEDDING_MODEL, args.embedding_backend)
+    model_key = embedding_model_key(DEFAULT_EMBEDDING_MODEL, args.embedding_backend)
+    text_index = None
+    vector_index = None
+    saved_paths = []
+    if args.snapshot is not None:
+        snapshot = get_snapshot(CATALOG_PATH, args.snapshot)
+        if snapshot is None:
+            console.print(f"[red]No snapshot with id {args.snapshot} (see --list-snapshots)[/red]")
+            return
+        path = snapshot["chunks_path"]
+        if not path.exists():
+            console.print(f"[red]Chunks file of snapshot {args.snapshot} is missing: {path} "
+                          f"(--refresh-catalog drops it)[/red]")
+            return
+        all_chunks = load_chunks(path)
+        embeddings = load_embeddings(path, model_key, count=len(all_chunks))
+        text_index = load_text_index(path, all_chunks)
+        if args.vector_index == "ivf" and embeddings is not None:
+            vector_index = load_ann_index(path, embeddings, all_chunks, model_key, nprobe=args.nprobe)
+        console.print(f"📂 Loaded snapshot {snapshot['id']}: [yellow]{path}[/yellow] ({len(all_chunks)} chunks)")
+        if embeddings is None or text_index is None or (args.vector_index == "ivf" and vector_index is None):
+            # Missing artifacts are built below and saved next to the snapshot.
+            saved_paths.append(path)
     else:
-        console.print("ℹ️ Chunks not saved to disk")
+        all_chunks, embeddings, (owner, repo, branch) = ingest(args, embedding_model)
+        params = {"size": args.size, "step": args.step, "level": args.level, "min_size": args.min_size,
+                  "dedup": args.dedup}
+        if args.save_json:
+            saved_paths.append(save_chunks_jsonl(all_chunks, owner, repo, branch, args.method, params=params,
+                                                 compression=args.compress))
+        if args.save_store:
+            saved_paths.append(save_chunks_store(all_chunks, owner, repo, branch, args.method, params=params))
+        for path in saved_paths:
+            console.print(f"✅ Chunks saved to [yellow]{path}[/yellow]")
+        if not saved_paths:
+            console.print("ℹ️ Chunks not saved to disk")
+
+    if args.check_parity and args.embedding_backend != "torch":
+        sample = [c["chunk"] for c in all_chunks[:256]]
+        parity = check_backend_parity(sample, DEFAULT_EMBEDDING_MODEL, args.embedding_backend)
+        console.print(f"⚖️ {args.embedding_backend} vs torch on {len(sample)} chunks: "
+                      + ", ".join(f"{k}={v:.4f}" for k, v in parity.items()))
 
     # Step 2. Build indexes
     console.print("🔍 Building indexes...")
-    text_index = create_text_index(all_chunks)
-    embedding_model = load_embedding_model()
-    vector_index = create_vector_index(all_chunks, embedding_model)
+    # Only what is built here is saved; rewriting loaded embeddings would change their
+    # mtime and invalidate the IVF index saved for them.
+    embeddings_loaded = args.snapshot is not None and embeddings is not None
+    text_index_loaded, vector_index_loaded = text_index is not None, vector_index is not None
+    if text_index is None:
+        text_index = create_text_index(all_chunks)
+    cache = None if args.no_embedding_cache else EmbeddingCache(model_key)
+    if vector_index is None:
+        with yaspin(text="Embedding chunks...", color="cyan") as spinner:
+            def report(done, total):
+                spinner.text = f"Embedded {done}/{total} new chunks"
+
+            vector_index = create_vector_index(all_chunks, embedding_model, embeddings=embeddings, cache=cache,
+                                               batch_size=args.batch_size, max_batch_tokens=args.max_batch_tokens,
+                                               progress=report, workers=args.embed_workers,
+                                               model_name=DEFAULT_EMBEDDING_MODEL, backend=args.embedding_backend,
+                                               index_type=args.vector_index, n_lists=args.n_lists,
+                                               nprobe=args.nprobe)
+            spinner.ok("✅")
+    for path in saved_paths:
+        # Saved next to the chunks so loading them later skips re-encoding and refitting.
+        if not embeddings_loaded:
+            save_embeddings(vector_index.vectors, path, model_key)
+        if not text_index_loaded:
+            save_text_index(text_index, path)
+        if args.vector_index == "ivf" and not vector_index_loaded:
+            # After the embeddings: the IVF file records which embeddings it indexes.
+            save_ann_index(vector_index, path, model_key)
 
-    # Step 3. Agent setup
-    tools = make_agent_tools(text_index, vector_index, embedding_model)
+    # Step 3. Agent setup (pydantic_ai is imported only once the indexes are ready)
+    from core.agent import create_agent, run_agent
+
+    query_cache = QueryEmbeddingCache(embedding_model)
+    tools = make_agent_tools(text_index, vector_index, embedding_model, query_cache=query_cache)
     agent = create_agent(prompt_file_path="prompts/system_prompt.yml",
                          model_name="gpt-4o-mini",
                          tools=tools)
@@ -87,6 +306,9 @@ def main():
             console.print("\n👋 Exiting...")
             break
 
+    stats = query_cache.info()
+    console.print(f"🧠 Query embedding cache: {stats['hits']} hits, {stats['misses']} misses")
+
 
 if __name__ == "__main__":
     main()
@@ -1,14 +1,20 @@
-from typing import List, Dict, Any, Callable
-from minsearch import Index, VectorSearch
-from sentence_transformers import SentenceTransformer
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Optional
 
 from .search import text_search, vector_search, hybrid_search
+from .embedding_cache import QueryEmbeddingCache
+
+if TYPE_CHECKING:
+    from minsearch import Index, VectorSearch
+    from sentence_transformers import SentenceTransformer
 
 
 def make_agent_tools(
     text_index: Index,
     vector_index: VectorSearch,
     embedding_model: SentenceTransformer,
+    query_cache: Optional[QueryEmbeddingCache] = None,
 ) -> List[Callable[[str, int], List[Dict[str, Any]]]]:
     """
     Return agent-ready versions of the search tools that are proper functions,
@@ -18,21 +24,31 @@ def make_agent_tools(
         text_index: A fitted lexical Index.
         vector_index: A fitted VectorSearch.
         embedding_model: Preloaded SentenceTransformer model.
+        query_cache: Query embedding cache shared by the vector and hybrid tools
+            (default: a new 1024-entry cache); pass one to read its hit/miss counters.
 
     Returns:
         List of callable search tools (text, vector, hybrid).
+
+    Results are returned as plain dicts, so compact `Chunk` views are materialized
+    only for the handful of hits handed to the agent.
     """
+    if query_cache is None:
+        query_cache = QueryEmbeddingCache(embedding_model)
 
     def text_search_tool(query: str, num_results: int = 5) -> List[Dict[str, Any]]:
         """Perform a lexical search over the ingested documentation."""
-        return text_search(text_index, query, top_k=num_results)
+        return [dict(r) for r in text_search(text_index, query, top_k=num_results)]
 
     def vector_search_tool(query: str, num_results: int = 5) -> List[Dict[str, Any]]:
         """Perform a semantic (vector-based) search over the ingested documentation."""
-        return vector_search(vector_index, embedding_model, query, top_k=num_results)
+        results = vector_search(vector_index, embedding_model, query, top_k=num_results, query_cache=query_cache)
+        return [dict(r) for r in results]
 
     def hybrid_search_tool(query: str, num_results: int = 5) -> List[Dict[str, Any]]:
         """Perform a hybrid search combining lexical and semantic results."""
-        return hybrid_search(text_index, vector_index, embedding_model, query, top_k=num_results)
+        results = hybrid_search(text_index, vector_index, embedding_model, query,
+                                top_k=num_results, query_cache=query_cache)
+        return [dict(r) for r in results]
 
     return [text_search_tool, vector_search_tool, hybrid_search_tool]
@@ -0,0 +1,275 @@
+"""
+Approximate nearest-neighbour vector index (IVF) in NumPy.
+
+`IVFVectorSearch` is a drop-in alternative to `minsearch.VectorSearch` for large
+corpora. It has the same `fit(vectors, payload)` / `search(query_vector, ...)`
+contract, and the same `vectors` and `docs` attributes.
+
+- `fit` clusters the normalized embeddings with spherical k-means into `n_lists`
+  inverted lists (default ~sqrt(n)).
+- `search` scores the query against the centroids and then scans only the
+  `nprobe` closest lists. Raising `nprobe` trades latency for recall, and
+  `nprobe >= n_lists` is an exact search.
+
+The index keeps only the centroids, the list layout and the vector norms. Vectors
+are read from `vectors` (which may be memory-mapped), so the index adds a few
+bytes per chunk and can be saved and loaded without pickle.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Union
+from pathlib import Path
+
+import numpy as np
+
+IVF_VERSION = 1
+# Rows processed per matrix product while training and assigning lists.
+_BLOCK = 65536
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    m = np.asarray(m, dtype=np.float32)
+    return m / np.maximum(np.linalg.norm(m, axis=-1, keepdims=True), 1e-12)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for each row, computed in blocks."""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _BLOCK):
+        block = _normalize(vectors[start:start + _BLOCK])
+        labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(
+    vectors: np.ndarray,
+    n_lists: int,
+    n_iter: int = 10,
+    sample_size: Optional[int] = None,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Spherical k-means on a sample of the vectors.
+
+    Args:
+        vectors: 2D array of embeddings.
+        n_lists: Number of centroids.
+        n_iter: Lloyd iterations.
+        sample_size: Training sample size (default: 256 points per centroid).
+        seed: Random seed for sampling and initialization.
+
+    Returns:
+        float32 array of shape (n_lists, dim) with unit-norm centroids.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    sample_size = min(n, sample_size or 256 * n_lists)
+    sample = _normalize(vectors[np.sort(rng.choice(n, sample_size, replace=False))])
+
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=n_lists)
+        # Re-seed empty lists with random sample points.
+        empty = counts == 0
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class IVFVectorSearch:
+    """
+    Inverted-file vector index with cosine similarity.
+
+    Args:
+        n_lists: Number of inverted lists (default: ~sqrt(number of vectors)).
+        nprobe: Lists scanned per query; higher is slower and more accurate.
+        n_iter: k-means iterations used by `fit`.
+        keyword_fields: Fields that `filter_dict` may filter on, as in VectorSearch.
+        seed: Random seed for k-means.
+    """
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        nprobe: int = 16,
+        n_iter: int = 10,
+        keyword_fields: Optional[List[str]] = None,
+        seed: int = 0,
+    ):
+        if n_lists is not None and n_lists < 1:
+            raise ValueError("n_lists must be a positive integer.")
+        if nprobe < 1:
+            raise ValueError("nprobe must be a positive integer.")
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.n_iter = n_iter
+        self.keyword_fields = keyword_fields if keyword_fields is not None else []
+        self.seed = seed
+        self.vectors: Optional[np.ndarray] = None
+        self.docs: Sequence[Dict[str, Any]] = []
+        self.centroids: Optional[np.ndarray] = None
+        self.list_ids: Optional[np.ndarray] = None
+        self.list_offsets: Optional[np.ndarray] = None
+        self.norms: Optional[np.ndarray] = None
+
+    def fit(self, vectors: np.ndarray, payload: Sequence[Dict[str, Any]]) -> "IVFVectorSearch":
+        """
+        Cluster `vectors` into inverted lists.
+
+        Args:
+            vectors: 2D array of shape (n_docs, dim); it is referenced, not copied.
+            payload: Documents aligned with `vectors`.
+        """
+        if len(vectors) != len(payload):
+            raise ValueError("Number of vectors must match number of payload documents")
+
+        self.vectors = vectors
+        self.docs = payload
+        n = len(vectors)
+        if n == 0:
+            return self
+
+        n_lists = min(n, self.n_lists or max(1, int(np.sqrt(n))))
+        self.centroids = train_centroids(vectors, n_lists, self.n_iter, seed=self.seed)
+        labels = _assign(vectors, self.centroids)
+        self.list_ids = np.argsort(labels, kind="stable")
+        self.list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_lists), out=self.list_offsets[1:])
+        self.norms = np.empty(n, dtype=np.float32)
+        for start in range(0, n, _BLOCK):
+            block = np.asarray(vectors[start:start + _BLOCK], dtype=np.float32)
+            self.norms[start:start + len(block)] = np.linalg.norm(block, axis=1)
+        return self
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        n_lists = len(self.centroids)
+        nprobe = max(1, nprobe)
+        if nprobe >= n_lists:
+            return np.arange(len(self.vectors))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([
+            self.list_ids[self.list_offsets[i]:self.list_offsets[i + 1]] for i in probe
+        ])
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        num_results: int = 10,
+        output_ids: bool = False,
+        nprobe: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the documents most similar to `query_vector`, best first.
+
+        Same contract as `minsearch.VectorSearch.search`: only positive scores are
+        returned, and `filter_dict` keeps exact matches on `keyword_fields`.
+
+        Args:
+            query_vector: 1D query embedding.
+            filter_dict: Keyword field filters.
+            num_results: Maximum number of results.
+            output_ids: Add the document index as `_id`.
+            nprobe: Lists to scan for this query (default: `self.nprobe`); at least one
+                list is scanned.
+        """
+        if not len(self.docs) or self.centroids is None:
+            return []
+
+        query = _normalize(np.asarray(query_vector).reshape(-1))
+        ids = self._candidates(query, self.nprobe if nprobe is None else nprobe)
+        if filter_dict:
+            for field, value in filter_dict.items():
+                if field in self.keyword_fields:
+                    keep = np.fromiter((self.docs[int(i)].get(field, "") == value for i in ids), bool, len(ids))
+                    ids = ids[keep]
+        if not len(ids):
+            return []
+
+        # Candidates are gathered in index order, which keeps reads from a memory-mapped file sequential.
+        ids = np.sort(ids)
+        scores = (np.asarray(self.vectors[ids], dtype=np.float32) @ query) / np.maximum(self.norms[ids], 1e-12)
+        positive = scores > 0
+        ids, scores = ids[positive], scores[positive]
+
+        k = min(num_results, len(ids))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        if output_ids:
+            return [{**self.docs[int(i)], "_id": int(i)} for i in ids[top]]
+        return [self.docs[int(i)] for i in ids[top]]
+
+    def save(self, path: Union[str, Path], **meta: Any) -> Path:
+        """
+        Save the index structure (not the vectors or documents) to an `.npz` file.
+
+        Extra keyword arguments are stored as metadata (e.g. the embedding model).
+        An index fitted on no vectors is saved with empty lists.
+        """
+        path = Path(path)
+        if self.centroids is None:
+            shape = np.shape(self.vectors) if self.vectors is not None else ()
+            centroids = np.zeros((0, shape[1] if len(shape) == 2 else 0), dtype=np.float32)
+            list_ids, list_offsets = np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+            norms = np.zeros(0, dtype=np.float32)
+        else:
+            centroids, list_ids, list_offsets, norms = self.centroids, self.list_ids, self.list_offsets, self.norms
+        tmp_path = path.with_name(path.name + ".tmp.npz")
+        np.savez(
+            tmp_path,
+            version=np.int64(IVF_VERSION),
+            count=np.int64(len(self.docs)),
+            dim=np.int64(centroids.shape[1]),
+            nprobe=np.int64(self.nprobe),
+            meta=np.array(repr(sorted(meta.items()))),
+            centroids=centroids,
+            list_ids=list_ids,
+            list_offsets=list_offsets,
+            norms=norms,
+        )
+        tmp_path.replace(path)
+        return path
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        vectors: np.ndarray,
+        payload: Sequence[Dict[str, Any]],
+        nprobe: Optional[int] = None,
+        **meta: Any,
+    ) -> Optional["IVFVectorSearch"]:
+        """
+        Load an index saved with `save` and attach `vectors` and `payload`.
+
+        Returns None when the file is missing, was written by another format version,
+        or does not match the vectors (count, dimension) or the given metadata.
+        """
+        if nprobe is not None and nprobe < 1:
+            raise ValueError("nprobe must be a positive integer.")
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            if (
+                int(data["version"]) != IVF_VERSION
+                or int(data["count"]) != len(vectors)
+                or len(vectors) != len(payload)
+                or vectors.ndim != 2
+                or int(data["dim"]) != vectors.shape[1]
+                or str(data["meta"]) != repr(sorted(meta.items()))
+            ):
+                return None
+            index = cls(n_lists=len(data["centroids"]) or None, nprobe=nprobe or max(1, int(data["nprobe"])))
+            # An empty index is left unfitted, as `fit` leaves it.
+            index.centroids = data["centroids"] if len(data["centroids"]) else None
+            index.list_ids = data["list_ids"]
+            index.list_offsets = data["list_offsets"]
+            index.norms = data["norms"]
+        index.vectors = vectors
+        index.docs = payload
+        return index
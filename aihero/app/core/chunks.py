@@ -1,15 +1,105 @@
+import os
 import re
-from typing import List, Dict, Any, Literal, Union
+import sys
+import heapq
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Literal, Optional, Union
 from utils.utils import save_chunks_jsonl
 
-def simple_chunking(text: str, size: int, save_file: Union[bool, str] = False) -> List[Dict[str, Any]]:
+ChunkMethod = Literal["simple", "sliding", "paragraph", "section", "tokens", "recursive"]
+
+
+class Chunk(MutableMapping):
+    """
+    A compact, dict-compatible chunk that references its document instead of copying it.
+
+    Chunks of the same document share one `source` string and only store offsets, so
+    overlapping windows cost a few machine words each instead of a substring plus a dict.
+    The `chunk` text is sliced from `source` on access. Filenames are interned, and any
+    other key (frontmatter fields, repo tags, ...) goes into a lazily created `extra` dict.
+
+    Behaves like `{'start', 'end', 'chunk', 'filename', ...}` for reading and item
+    assignment, so it can be passed to minsearch and the search tools as is. Use
+    `dict(chunk)` where a real dict is required (e.g. JSON serialization).
+    """
+
+    __slots__ = ("source", "start", "end", "filename", "extra")
+
+    def __init__(self, source: str, start: int, end: int, filename: Optional[str] = None):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.filename = sys.intern(filename) if isinstance(filename, str) else filename
+        self.extra: Optional[Dict[str, Any]] = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "chunk":
+            return self.source[self.start:self.end]
+        if key == "start":
+            return self.start
+        if key == "end":
+            return self.end
+        if key == "filename" and self.filename is not None:
+            return self.filename
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == "chunk":
+            # Detach from the shared document rather than mutating it.
+            self.source, self.start, self.end = value, 0, len(value)
+        elif key in ("start", "end"):
+            setattr(self, key, value)
+        elif key == "filename":
+            self.filename = sys.intern(value) if isinstance(value, str) else value
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key == "filename" and self.filename is not None:
+            self.filename = None
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield "start"
+        yield "end"
+        yield "chunk"
+        if self.filename is not None:
+            yield "filename"
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return 3 + (self.filename is not None) + (len(self.extra) if self.extra else 0)
+
+    def __repr__(self) -> str:
+        return f"Chunk({dict(self)!r})"
+
+    def __reduce__(self):
+        # Slotted classes have no default reduction; pickling and Streamlit's cache
+        # hashing (which falls back to __reduce__) both need one.
+        return (Chunk, (self.source, self.start, self.end, self.filename), self.extra)
+
+    def __setstate__(self, extra: Optional[Dict[str, Any]]) -> None:
+        self.extra = extra
+
+
+def simple_chunking(text: str, size: int, save_file: Union[bool, str] = False) -> List[Chunk]:
     if size <= 0:
         raise ValueError("Size must be a positive integer.")
 
-    result: List[Dict[str, Any]] = []
+    result: List[Chunk] = []
     for i in range(0, len(text), size):
-        chunk = text[i:i + size]
-        result.append({'start': i, 'end': min(i + size, len(text)), 'chunk': chunk})
+        result.append(Chunk(text, i, min(i + size, len(text))))
 
     if save_file:
         path = "chunks.jsonl" if isinstance(save_file, bool) else save_file
@@ -21,14 +111,13 @@ def sliding_window_chunking(
     size: int,
     step: int,
     save_file: Union[bool, str] = False,
-) -> List[Dict[str, Any]]:
+) -> List[Chunk]:
     if size <= 0 or step <= 0:
         raise ValueError("Size and step must be positive integers.")
 
-    result: List[Dict[str, Any]] = []
+    result: List[Chunk] = []
     for i in range(0, len(text), step):
-        chunk = text[i:i + size]
-        result.append({'start': i, 'end': min(i + size, len(text)), 'chunk': chunk})
+        result.append(Chunk(text, i, min(i + size, len(text))))
         if i + size >= len(text):
             break
 
@@ -38,17 +127,125 @@ def sliding_window_chunking(
     return result
 
 
-def paragraph_chunking(text: str, save_file: Union[bool, str] = False) -> List[Dict[str, Any]]:
-    paragraphs: List[str] = re.split(r"\n\s*\n", text.strip())
-    result: List[Dict[str, Any]] = []
-    start = 0
-    for p in paragraphs:
-        p = p.strip()
-        if not p:
+def paragraph_chunking(text: str, save_file: Union[bool, str] = False) -> List[Chunk]:
+    """Split text on blank lines; offsets are exact positions of the stripped paragraphs in `text`."""
+    result: List[Chunk] = []
+    pos = 0
+    for sep in [*re.finditer(r"\n\s*\n", text), None]:
+        seg_end = sep.start() if sep else len(text)
+        start, end = pos, seg_end
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            result.append(Chunk(text, start, end))
+        if sep:
+            pos = sep.end()
+
+    if save_file:
+        path = "chunks.jsonl" if isinstance(save_file, bool) else save_file
+        save_chunks_jsonl(result, path)
+    return result
+
+
+def markdown_section_chunking(text: str, level: int = 2, save_file: Union[bool, str] = False) -> List[Chunk]:
+    """
+    Split Markdown into sections starting at each header of the given level.
+
+    Header positions are collected in a single regex pass and every section is
+    sliced directly from `text`, so `text[start:end] == chunk` holds exactly.
+    Text before the first header is skipped; trailing whitespace is trimmed.
+    """
+    pattern = re.compile(r'^#{' + str(level) + r'} .+$', re.MULTILINE)
+    starts = [m.start() for m in pattern.finditer(text)]
+
+    result: List[Chunk] = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(text)
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        result.append(Chunk(text, start, end))
+
+    if save_file:
+        path = "chunks.jsonl" if isinstance(save_file, bool) else save_file
+        save_chunks_jsonl(result, path)
+    return result
+
+
+def _trim_span(text: str, start: int, end: int) -> tuple:
+    """Shrink [start, end) so it does not begin or end with whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def recursive_chunking(
+    text: str,
+    max_size: int = 2000,
+    min_size: int = 200,
+    step: Optional[int] = None,
+    level: int = 2,
+    save_file: Union[bool, str] = False,
+) -> List[Chunk]:
+    """
+    Split text hierarchically so every chunk stays within [min_size, max_size] characters.
+
+    1. Split into Markdown sections at the given header level (text before the first
+       header is kept as its own section).
+    2. Sections longer than `max_size` are split into paragraphs.
+    3. Paragraphs still longer than `max_size` are cut into sliding windows of
+       `max_size` characters advancing by `step` (default: `max_size`, no overlap).
+    4. Neighbouring pieces are merged while one of them is shorter than `min_size`
+       and the merged span still fits in `max_size`.
+
+    All chunks are exact slices of `text`. A chunk can only stay below `min_size`
+    when its neighbours leave no room to merge, or the whole text is that short.
+    """
+    if max_size <= 0 or min_size < 0 or min_size > max_size:
+        raise ValueError("Sizes must satisfy 0 <= min_size <= max_size and max_size > 0.")
+    step = min(step or max_size, max_size)
+
+    pattern = re.compile(r'^#{' + str(level) + r'} .+$', re.MULTILINE)
+    bounds = [0] + [m.start() for m in pattern.finditer(text) if m.start() > 0] + [len(text)]
+
+    pieces: List[tuple] = []
+    for sec_start, sec_end in zip(bounds, bounds[1:]):
+        sec_start, sec_end = _trim_span(text, sec_start, sec_end)
+        if sec_start == sec_end:
+            continue
+        if sec_end - sec_start <= max_size:
+            pieces.append((sec_start, sec_end))
             continue
-        end = start + len(p)
-        result.append({'start': start, 'end': end, 'chunk': p})
-        start = end + 2  # account for skipped newlines
+        for p in paragraph_chunking(text[sec_start:sec_end]):
+            p_start, p_end = sec_start + p.start, sec_start + p.end
+            if p_end - p_start <= max_size:
+                pieces.append((p_start, p_end))
+                continue
+            # Without overlap, spread the paragraph evenly over the fewest windows so the
+            # last one is not a tiny remainder.
+            width, stride = max_size, step
+            if step == max_size:
+                n_windows = -(-(p_end - p_start) // max_size)
+                width = stride = -(-(p_end - p_start) // n_windows)
+            for i in range(p_start, p_end, stride):
+                pieces.append(_trim_span(text, i, min(i + width, p_end)))
+                if i + width >= p_end:
+                    break
+
+    merged: List[tuple] = []
+    for start, end in pieces:
+        if merged:
+            prev_start, prev_end = merged[-1]
+            undersized = prev_end - prev_start < min_size or end - start < min_size
+            if undersized and end - prev_start <= max_size:
+                merged[-1] = (prev_start, end)
+                continue
+        merged.append((start, end))
+
+    result = [Chunk(text, start, end) for start, end in merged if start < end]
 
     if save_file:
         path = "chunks.jsonl" if isinstance(save_file, bool) else save_file
@@ -56,19 +253,88 @@ def paragraph_chunking(text: str, save_file: Union[bool, str] = False) -> List[D
     return result
 
 
-def markdown_section_chunking(text: str, level: int = 2, save_file: Union[bool, str] = False) -> List[Dict[str, Any]]:
-    header_pattern = r'^(#{' + str(level) + r'} )(.+)$'
-    pattern = re.compile(header_pattern, re.MULTILINE)
-    parts = pattern.split(text)
+@lru_cache(maxsize=None)
+def load_tokenizer(model_name: str = "multi-qa-distilbert-cos-v1") -> Any:
+    """
+    Load (once per process) the fast tokenizer of a SentenceTransformer model.
+
+    Short names are resolved like SentenceTransformer does, under the `sentence-transformers/` org.
+    """
+    from transformers import AutoTokenizer
+
+    repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    return AutoTokenizer.from_pretrained(repo_id, use_fast=True)
+
+
+def _token_window_size(tokenizer: Any, size: int) -> int:
+    """Clamp a window size to what the model embeds without truncation (minus [CLS]/[SEP])."""
+    limit = tokenizer.model_max_length - tokenizer.num_special_tokens_to_add()
+    # Tokenizers without a configured limit report a huge sentinel value.
+    return min(size, limit) if limit < 1_000_000 else size
+
+
+def _token_windows(text: str, offsets: List[Any], size: int, step: int) -> List[Chunk]:
+    """Turn token character offsets into sliding windows of at most `size` tokens."""
+    result: List[Chunk] = []
+    for i in range(0, len(offsets), step):
+        result.append(Chunk(text, offsets[i][0], offsets[min(i + size, len(offsets)) - 1][1]))
+        if i + size >= len(offsets):
+            break
+    return result
+
+
+def token_chunking_batch(
+    texts: List[str],
+    size: int,
+    step: int,
+    tokenizer: Optional[Any] = None,
+) -> List[List[Chunk]]:
+    """
+    Chunk several texts into windows measured in model tokens.
+
+    All texts are tokenized in one batched call to the fast (Rust) tokenizer. Window
+    boundaries are mapped back to character offsets, so `chunk == text[start:end]`.
+    `size` is clamped to the model's maximum sequence length so no chunk is silently
+    truncated at embedding time, and `step` is clamped to `size` so windows never leave gaps.
+
+    Args:
+        texts: Texts to chunk.
+        size: Window size in tokens.
+        step: Step between window starts in tokens.
+        tokenizer: Fast tokenizer (default: the tokenizer of the default embedding model).
+
+    Returns:
+        One list of chunks per input text.
+    """
+    if size <= 0 or step <= 0:
+        raise ValueError("Size and step must be positive integers.")
+
+    tokenizer = tokenizer or load_tokenizer()
+    size = _token_window_size(tokenizer, size)
+    step = min(step, size)
+
+    encoded = tokenizer(
+        texts,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+        verbose=False,
+    )
+    return [
+        _token_windows(text, offsets, size, step)
+        for text, offsets in zip(texts, encoded["offset_mapping"])
+    ]
 
-    result: List[Dict[str, Any]] = []
-    for i in range(1, len(parts), 3):
-        header = (parts[i] + parts[i + 1]).strip()
-        content = parts[i + 2].strip() if i + 2 < len(parts) else ""
-        section = f"{header}\n\n{content}" if content else header
-        start = text.find(section)
-        end = start + len(section)
-        result.append({'start': start, 'end': end, 'chunk': section})
+
+def token_chunking(
+    text: str,
+    size: int,
+    step: int,
+    tokenizer: Optional[Any] = None,
+    save_file: Union[bool, str] = False,
+) -> List[Chunk]:
+    """Sliding-window chunking measured in model tokens (see `token_chunking_batch`)."""
+    result = token_chunking_batch([text], size, step, tokenizer)[0]
 
     if save_file:
         path = "chunks.jsonl" if isinstance(save_file, bool) else save_file
@@ -78,12 +344,14 @@ def markdown_section_chunking(text: str, level: int = 2, save_file: Union[bool,
 
 def chunk_text(
     text: str,
-    method: Literal["simple", "sliding", "paragraph", "section"],
+    method: ChunkMethod,
     size: int = 2000,
     step: int = 1000,
     level: int = 2,
-    save_file: Union[bool, str] = False
-) -> List[Dict[str, Any]]:
+    save_file: Union[bool, str] = False,
+    tokenizer: Optional[Any] = None,
+    min_size: int = 200,
+) -> List[Chunk]:
     if method == "simple":
         return simple_chunking(text, size, save_file)
     elif method == "sliding":
@@ -92,5 +360,148 @@ def chunk_text(
         return paragraph_chunking(text, save_file)
     elif method == "section":
         return markdown_section_chunking(text, level, save_file)
+    elif method == "tokens":
+        return token_chunking(text, size, step, tokenizer, save_file)
+    elif method == "recursive":
+        return recursive_chunking(text, size, min_size, step, level, save_file)
     else:
         raise ValueError(f"Unknown method: {method}")
+
+
+def iter_chunks(
+    docs: Iterable[Dict[str, Any]],
+    method: ChunkMethod,
+    size: int = 2000,
+    step: int = 1000,
+    level: int = 2,
+    tokenizer: Optional[Any] = None,
+    batch_size: int = 64,
+    min_size: int = 200,
+) -> Iterator[Chunk]:
+    """
+    Lazily chunk a stream of documents, tagging each chunk with its source filename.
+
+    Consumes `docs` one document at a time (e.g. from `iter_repo_documents`), so chunks
+    are produced while the rest of the repository is still being read. With
+    `method="tokens"`, documents are pulled `batch_size` at a time so they can be
+    tokenized in one batched call.
+
+    Args:
+        docs: Iterable of parsed documents with `content` and `filename` keys.
+        method: Chunking method passed to `chunk_text`.
+        size: Chunk size (for simple/sliding, in tokens for tokens, maximum for recursive).
+        step: Step size (for sliding/tokens/recursive).
+        level: Markdown header level (for section/recursive).
+        tokenizer: Fast tokenizer (for tokens).
+        batch_size: Documents tokenized per batch (for tokens).
+        min_size: Minimum chunk size (for recursive).
+
+    Yields:
+        Chunks with `start`, `end`, `chunk` and `filename`.
+    """
+    if method == "tokens":
+        docs = iter(docs)
+        while batch := list(islice(docs, batch_size)):
+            texts = [doc.get("content", "") for doc in batch]
+            for doc, doc_chunks in zip(batch, token_chunking_batch(texts, size, step, tokenizer)):
+                for c in doc_chunks:
+                    c["filename"] = doc.get("filename")
+                    yield c
+        return
+
+    for doc in docs:
+        for c in chunk_text(doc.get("content", ""), method=method, size=size, step=step, level=level,
+                            min_size=min_size):
+            c["filename"] = doc.get("filename")
+            yield c
+
+
+def _balanced_batches(sizes: List[int], num_batches: int) -> List[List[int]]:
+    """
+    Greedily assign item indices to `num_batches` batches with similar total size.
+
+    Largest items are placed first, each into the currently lightest batch. Indices
+    inside each batch are sorted so results can be reassembled in input order.
+    """
+    heap = [(0, b) for b in range(num_batches)]
+    batches: List[List[int]] = [[] for _ in range(num_batches)]
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        load, b = heapq.heappop(heap)
+        batches[b].append(i)
+        heapq.heappush(heap, (load + sizes[i], b))
+    return [sorted(batch) for batch in batches if batch]
+
+
+def _chunk_spans_batch(
+    texts: List[str],
+    method: ChunkMethod,
+    size: int,
+    step: int,
+    level: int,
+    min_size: int,
+) -> List[List[tuple]]:
+    """Process pool task: chunk a batch of texts and return only (start, end) offsets per text."""
+    if method == "tokens":
+        per_text = token_chunking_batch(texts, size, step)
+    else:
+        per_text = [
+            chunk_text(text, method=method, size=size, step=step, level=level, min_size=min_size)
+            for text in texts
+        ]
+    return [[(c.start, c.end) for c in chunks] for chunks in per_text]
+
+
+def chunk_corpus(
+    docs: Iterable[Dict[str, Any]],
+    method: ChunkMethod,
+    size: int = 2000,
+    step: int = 1000,
+    level: int = 2,
+    workers: Optional[int] = None,
+    batches_per_worker: int = 4,
+    min_size: int = 200,
+) -> List[Chunk]:
+    """
+    Chunk a whole corpus of documents, spreading the work across worker processes.
+
+    Documents are grouped into size-balanced batches (by content length) and chunked
+    in a process pool. Workers send back only chunk offsets; the `Chunk` views are
+    rebuilt here against the original document strings, so no chunk text crosses
+    process boundaries. Results are tagged with `filename` and returned in document
+    order, exactly as the serial `iter_chunks` would produce them.
+
+    Args:
+        docs: Parsed documents with `content` and `filename` keys.
+        method: Chunking method passed to `chunk_text`.
+        size: Chunk size (for simple/sliding, in tokens for tokens, maximum for recursive).
+        step: Step size (for sliding/tokens/recursive).
+        level: Markdown header level (for section/recursive).
+        workers: Number of worker processes (default: os.cpu_count(); 1 chunks in-process).
+        batches_per_worker: Batches per worker, to smooth out uneven batch runtimes.
+        min_size: Minimum chunk size (for recursive).
+
+    Returns:
+        List of chunks with `start`, `end`, `chunk` and `filename`.
+    """
+    docs = list(docs)
+    if workers == 1 or len(docs) < 2:
+        return list(iter_chunks(docs, method=method, size=size, step=step, level=level, min_size=min_size))
+
+    workers = workers or os.cpu_count() or 1
+    texts = [doc.get("content", "") for doc in docs]
+    batches = _balanced_batches([len(t) for t in texts], min(len(docs), workers * batches_per_worker))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_chunk_spans_batch, [texts[i] for i in batch], method, size, step, level, min_size)
+            for batch in batches
+        ]
+        spans: List[List[tuple]] = [[] for _ in docs]
+        for batch, future in zip(batches, futures):
+            for i, doc_spans in zip(batch, future.result()):
+                spans[i] = doc_spans
+
+    return [
+        Chunk(texts[i], start, end, doc.get("filename"))
+        for i, doc in enumerate(docs)
+        for start, end in spans[i]
+    ]
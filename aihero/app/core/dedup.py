@@ -0,0 +1,170 @@
+import re
+import zlib
+import hashlib
+from collections import defaultdict
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+# Mersenne prime used by the MinHash permutation family (as in datasketch).
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace, so formatting-only differences hash the same."""
+    return " ".join(text.lower().split())
+
+
+def _shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    """32-bit hashes of the word n-grams of a normalized text."""
+    words = re.findall(r"\w+", text)
+    if len(words) <= shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in set(shingles)), dtype=np.uint64)
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles.
+
+    Two signatures agree in a fraction of positions that estimates the Jaccard
+    similarity of the underlying shingle sets.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.a = rng.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self.b = rng.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """Return the MinHash signature (uint64 array of length `num_perm`) of a normalized text."""
+        hashes = _shingle_hashes(text, self.shingle_size)
+        # uint64 arithmetic wraps on overflow; that is fine for a hash family.
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            # The lower index stays the root, so the first occurrence is canonical.
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def duplicate_groups(
+    chunks: List[Dict[str, Any]],
+    text_field: str = "chunk",
+    near: bool = True,
+    threshold: float = 0.8,
+    num_perm: int = 64,
+    bands: int = 8,
+    shingle_size: int = 3,
+) -> List[List[int]]:
+    """
+    Group chunk indices that are exact or near duplicates of each other.
+
+    1. Exact duplicates: equal SHA-1 of the normalized text.
+    2. Near duplicates (optional): MinHash signatures are split into `bands` bands for
+       locality-sensitive hashing; chunks that share a band bucket are candidates, and a
+       candidate pair is merged if its estimated Jaccard similarity is >= `threshold`.
+
+    Args:
+        chunks: Chunks to inspect.
+        text_field: Field holding the chunk text.
+        near: Whether to run MinHash/LSH near-duplicate detection.
+        threshold: Minimum estimated Jaccard similarity for near duplicates.
+        num_perm: MinHash signature length (must be divisible by `bands`).
+        bands: Number of LSH bands.
+        shingle_size: Words per shingle.
+
+    Returns:
+        Groups of indices in first-occurrence order; each group is sorted and its
+        first index is the canonical chunk.
+    """
+    if num_perm % bands:
+        raise ValueError("num_perm must be divisible by bands.")
+
+    uf = _UnionFind(len(chunks))
+    texts = [normalize_text(c.get(text_field, "")) for c in chunks]
+
+    first_by_hash: Dict[str, int] = {}
+    representatives: List[int] = []
+    for i, text in enumerate(texts):
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if digest in first_by_hash:
+            uf.union(first_by_hash[digest], i)
+        else:
+            first_by_hash[digest] = i
+            representatives.append(i)
+
+    if near and len(representatives) > 1:
+        hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        signatures = {i: hasher.signature(texts[i]) for i in representatives}
+        rows = num_perm // bands
+        for band in range(bands):
+            buckets: Dict[bytes, List[int]] = defaultdict(list)
+            for i in representatives:
+                buckets[signatures[i][band * rows:(band + 1) * rows].tobytes()].append(i)
+            for members in buckets.values():
+                for pos, i in enumerate(members):
+                    for j in members[pos + 1:]:
+                        if uf.find(i) != uf.find(j) and np.mean(signatures[i] == signatures[j]) >= threshold:
+                            uf.union(i, j)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(chunks)):
+        groups[uf.find(i)].append(i)
+    return sorted(groups.values(), key=lambda g: g[0])
+
+
+def deduplicate_chunks(
+    chunks: List[Dict[str, Any]],
+    near: bool = True,
+    threshold: float = 0.8,
+    groups: Optional[List[List[int]]] = None,
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Drop duplicate chunks before indexing, keeping one canonical chunk per group.
+
+    The canonical chunk is the first occurrence. When it absorbed duplicates, it gets
+    a `filenames` list with every distinct source file of its group, so the answer
+    can still cite all the places the text appears.
+
+    Args:
+        chunks: Chunks to deduplicate.
+        near: Whether to also merge near duplicates (MinHash/LSH).
+        threshold: Minimum estimated Jaccard similarity for near duplicates.
+        groups: Precomputed output of `duplicate_groups` (computed if omitted).
+        **kwargs: Extra arguments for `duplicate_groups`.
+
+    Returns:
+        Deduplicated chunks in original order.
+    """
+    if groups is None:
+        groups = duplicate_groups(chunks, near=near, threshold=threshold, **kwargs)
+
+    result: List[Dict[str, Any]] = []
+    for group in groups:
+        canonical = chunks[group[0]]
+        if len(group) > 1:
+            filenames = list(dict.fromkeys(chunks[i].get("filename") for i in group))
+            canonical["filenames"] = filenames
+        result.append(canonical)
+    return result
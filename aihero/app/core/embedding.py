@@ -0,0 +1,187 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+# Rough characters-per-token ratio used to estimate padded batch sizes without tokenizing.
+CHARS_PER_TOKEN = 4
+
+ProgressCallback = Callable[[int, int], None]
+
+# Per-process model, loaded once by the pool initializer.
+_worker_model: Any = None
+
+
+def length_batches(
+    lengths: List[int],
+    batch_size: int = 32,
+    max_batch_tokens: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    Group indices into batches of similar length, longest first.
+
+    Sorting by length keeps padding (every text in a batch is padded to the longest
+    one) to a minimum. A batch closes when it holds `batch_size` texts or, if
+    `max_batch_tokens` is set, when its padded size (longest length x count) would
+    exceed it. Starting with the longest texts makes an out-of-memory batch show up
+    immediately rather than at the end of a long run.
+
+    Args:
+        lengths: Estimated token length of each text.
+        batch_size: Maximum texts per batch.
+        max_batch_tokens: Cap on padded tokens per batch (bounds peak activation memory).
+
+    Returns:
+        Batches of indices into `lengths`.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be a positive integer.")
+
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    for i in order:
+        # The first index of a batch is its longest text.
+        padded = (lengths[batch[0]] if batch else lengths[i]) * (len(batch) + 1)
+        if batch and (len(batch) == batch_size or (max_batch_tokens and padded > max_batch_tokens)):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _estimate_lengths(texts: List[str], max_len: int) -> List[int]:
+    return [min(len(t) // CHARS_PER_TOKEN + 1, max_len) for t in texts]
+
+
+def batched_encode(
+    texts: List[str],
+    model: Any,
+    batch_size: int = 32,
+    max_batch_tokens: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> np.ndarray:
+    """
+    Embed texts in length-bucketed batches and return rows in input order.
+
+    Args:
+        texts: Texts to embed.
+        model: SentenceTransformer (anything with a compatible `encode`).
+        batch_size: Maximum texts per batch.
+        max_batch_tokens: Cap on padded tokens per batch; lengths are estimated from
+            characters and clipped to the model's max sequence length.
+        progress: Called as `progress(done, total)` after every batch.
+
+    Returns:
+        float32 array of shape (len(texts), dim).
+    """
+    lengths = _estimate_lengths(texts, getattr(model, "max_seq_length", None) or 512)
+    batches = length_batches(lengths, batch_size, max_batch_tokens)
+
+    out: Optional[np.ndarray] = None
+    done = 0
+    for batch in batches:
+        vectors = model.encode(
+            [texts[i] for i in batch],
+            batch_size=len(batch),
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        if out is None:
+            out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+        out[batch] = vectors
+        done += len(batch)
+        if progress is not None:
+            progress(done, len(texts))
+
+    if out is None:
+        return np.zeros((0, 0), dtype=np.float32)
+    return out
+
+
+def _init_embed_worker(model_name: str, backend: str, threads: int) -> None:
+    """
+    Process pool initializer: pin torch and ONNX Runtime threads and load this
+    worker's copy of the model.
+    """
+    global _worker_model
+    import torch
+
+    from .search import load_embedding_model
+
+    torch.set_num_threads(threads)
+    _worker_model = load_embedding_model(model_name, backend, threads=threads)
+
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    """Process pool task: embed one length-bucketed batch with the worker's model."""
+    return np.asarray(
+        _worker_model.encode(texts, batch_size=len(texts), convert_to_numpy=True, show_progress_bar=False),
+        dtype=np.float32,
+    )
+
+
+def parallel_encode(
+    texts: List[str],
+    model_name: str,
+    workers: Optional[int] = None,
+    batch_size: int = 32,
+    max_batch_tokens: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    max_seq_length: int = 512,
+    backend: str = "torch",
+) -> np.ndarray:
+    """
+    Embed texts across worker processes, each with its own copy of the model.
+
+    The length-bucketed batches of `batched_encode` are the unit of work. Each worker
+    runs torch with a share of the cores (cpu_count // workers threads), which scales
+    better on many-core CPUs than one process with many intra-op threads. Batches are
+    written into one contiguous float32 matrix as they complete.
+
+    Workers are started with "spawn", since forking a process that already runs
+    torch threads can deadlock.
+
+    Args:
+        texts: Texts to embed.
+        model_name: Model each worker loads with `load_embedding_model`.
+        workers: Number of worker processes (default: os.cpu_count()).
+        batch_size: Maximum texts per batch.
+        max_batch_tokens: Cap on padded tokens per batch.
+        progress: Called as `progress(done, total)` after every batch.
+        max_seq_length: Length cap used when estimating token lengths.
+        backend: Embedding backend the workers load (see `load_embedding_model`).
+
+    Returns:
+        float32 array of shape (len(texts), dim), in input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    batches = length_batches(_estimate_lengths(texts, max_seq_length), batch_size, max_batch_tokens)
+
+    out: Optional[np.ndarray] = None
+    done = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_embed_worker,
+        initargs=(model_name, backend, threads),
+    ) as executor:
+        futures = {executor.submit(_encode_shard, [texts[i] for i in batch]): batch for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            vectors = future.result()
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[batch] = vectors
+            done += len(batch)
+            if progress is not None:
+                progress(done, len(texts))
+
+    if out is None:
+        return np.zeros((0, 0), dtype=np.float32)
+    return out
@@ -0,0 +1,194 @@
+import os
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+EMBEDDING_CACHE_PATH = Path(
+    os.environ.get("AIHERO_EMBEDDING_CACHE", Path.home() / ".cache" / "aihero" / "embeddings.sqlite")
+)
+
+# SQLite limits the number of bound parameters per statement.
+_LOOKUP_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_hash BLOB NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (model, text_hash)
+) WITHOUT ROWID;
+"""
+
+
+def normalize_for_embedding(text: str) -> str:
+    """NFC-normalize and collapse whitespace; the tokenizer ignores both, so the embedding does too."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_key(text: str) -> bytes:
+    """Content address of a text: SHA-256 of its normalized form."""
+    return hashlib.sha256(normalize_for_embedding(text).encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed embedding cache.
+
+    Vectors are stored as float32 blobs in SQLite, keyed by (model name, SHA-256 of
+    the normalized text), so identical chunk texts are embedded once, across runs,
+    chunking strategies, branches and repositories.
+
+    A connection is opened per operation, so one instance can be shared across
+    threads (e.g. Streamlit sessions).
+    """
+
+    def __init__(self, model_name: str, path: Union[str, Path] = EMBEDDING_CACHE_PATH):
+        self.model_name = model_name
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=30)
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Return the cached vectors for the given keys (missing keys are absent)."""
+        found: Dict[bytes, np.ndarray] = {}
+        with closing(self._connect()) as conn:
+            for i in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[i:i + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    (self.model_name, *batch),
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        """Store vectors (one row per key)."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        rows = [(self.model_name, key, vectors.shape[1], vec.tobytes()) for key, vec in zip(keys, vectors)]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as conn:
+            (count,) = conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_name,)).fetchone()
+        return count
+
+
+def encode_with_cache(
+    texts: List[str],
+    cache: EmbeddingCache,
+    encode: Callable[[List[str]], np.ndarray],
+) -> np.ndarray:
+    """
+    Embed texts, calling `encode` only for texts not already in `cache`.
+
+    Texts that normalize to the same string are encoded once. Newly computed
+    vectors are written back to the cache.
+
+    Args:
+        texts: Texts to embed.
+        cache: Embedding cache for the model behind `encode`.
+        encode: Function embedding a list of texts into a 2D array.
+
+    Returns:
+        float32 array of shape (len(texts), dim), in input order.
+    """
+    keys = [text_key(t) for t in texts]
+    unique_keys = list(dict.fromkeys(keys))
+    vectors: Dict[bytes, Any] = cache.get_many(unique_keys)
+
+    missing = [k for k in unique_keys if k not in vectors]
+    if missing:
+        first_text = {}
+        for key, text in zip(keys, texts):
+            first_text.setdefault(key, text)
+        encoded = np.asarray(encode([first_text[k] for k in missing]), dtype=np.float32)
+        cache.put_many(missing, encoded)
+        vectors.update(zip(missing, encoded))
+
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack([vectors[k] for k in keys]).astype(np.float32, copy=False)
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded, thread-safe LRU cache of query embeddings.
+
+    The agent often repeats the same search (retries, follow-up turns, the
+    multi-try prompt), so query vectors are kept in memory and a repeated query
+    skips the model's forward pass. Queries are keyed by their normalized text, so
+    "how to install?" and "how to  install?" share an entry; the model always
+    encodes the query as given.
+
+    Keys are also case-folded when `casefold` is true. By default this is only
+    done for models whose tokenizer lowercases its input (`do_lower_case`), since
+    for cased models "Install" and "install" embed differently.
+
+    The model runs outside the lock, so concurrent misses do not serialize; two
+    threads missing on the same query may both encode it.
+    """
+
+    def __init__(self, model: Any, maxsize: int = 1024, casefold: Optional[bool] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer.")
+        self.model = model
+        self.maxsize = maxsize
+        if casefold is None:
+            casefold = bool(getattr(getattr(model, "tokenizer", None), "do_lower_case", False))
+        self.casefold = casefold
+        self.hits = 0
+        self.misses = 0
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, query: str) -> str:
+        key = normalize_for_embedding(query)
+        return key.casefold() if self.casefold else key
+
+    def encode(self, query: str) -> np.ndarray:
+        """Return the embedding of `query`, encoding it only on a cache miss."""
+        key = self._key(query)
+        with self._lock:
+            vector: Optional[np.ndarray] = self._vectors.get(key)
+            if vector is not None:
+                self._vectors.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        vector = np.asarray(self.model.encode(query, convert_to_numpy=True), dtype=np.float32)
+        vector.setflags(write=False)  # shared between callers
+        with self._lock:
+            self._vectors[key] = vector
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.maxsize:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def info(self) -> Dict[str, int]:
+        """Hit/miss counters and current size, like `functools.lru_cache.cache_info()`."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._vectors), "maxsize": self.maxsize}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors.clear()
+            self.hits = self.misses = 0
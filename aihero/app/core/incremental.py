@@ -0,0 +1,211 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .chunks import chunk_text
+from .search import embed_chunks
+
+MANIFEST_FILE = "manifest.json"
+CHUNKS_FILE = "chunks.jsonl"
+EMBEDDINGS_FILE = "embeddings.npy"
+
+
+def document_hash(doc: Dict[str, Any]) -> str:
+    """
+    Compute a content hash for a parsed document.
+
+    The frontmatter is part of the hash because fields such as `title` and
+    `description` are indexed alongside the chunk text.
+    """
+    payload = json.dumps(doc, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f_in:
+        for block in iter(lambda: f_in.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def diff_manifests(old: Dict[str, str], new: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Compare two {filename: hash} manifests.
+
+    Returns:
+        Dict with sorted `added`, `modified`, `deleted` and `unchanged` filename lists.
+    """
+    return {
+        "added": sorted(f for f in new if f not in old),
+        "modified": sorted(f for f in new if f in old and old[f] != new[f]),
+        "deleted": sorted(f for f in old if f not in new),
+        "unchanged": sorted(f for f in new if f in old and old[f] == new[f]),
+    }
+
+
+def load_ingest_state(state_dir: Path) -> Optional[Dict[str, Any]]:
+    """
+    Load the manifest, chunks and embeddings of a previous ingest.
+
+    Returns:
+        Dict with `params`, `files`, `chunks` and `embeddings`, or None if no state exists
+        or the chunks and embeddings on disk are not the ones the manifest describes
+        (e.g. after an interrupted save).
+    """
+    state_dir = Path(state_dir)
+    paths = [state_dir / MANIFEST_FILE, state_dir / CHUNKS_FILE, state_dir / EMBEDDINGS_FILE]
+    if not all(p.exists() for p in paths):
+        return None
+
+    with paths[0].open("r", encoding="utf-8") as f_in:
+        manifest = json.load(f_in)
+    if manifest.get("chunks_sha256") != _file_sha256(paths[1]):
+        return None
+    if manifest.get("embeddings_sha256") != _file_sha256(paths[2]):
+        return None
+    with paths[1].open("r", encoding="utf-8") as f_in:
+        chunks = [json.loads(line) for line in f_in]
+    embeddings = np.load(paths[2])
+    if len(chunks) != manifest.get("count") or len(embeddings) != len(chunks):
+        return None
+
+    return {
+        "params": manifest["params"],
+        "files": manifest["files"],
+        "chunks": chunks,
+        "embeddings": embeddings,
+    }
+
+
+def save_ingest_state(
+    state_dir: Path,
+    params: Dict[str, Any],
+    files: Dict[str, str],
+    chunks: List[Dict[str, Any]],
+    embeddings: np.ndarray,
+) -> Path:
+    """
+    Persist the manifest, chunks and embeddings of an ingest.
+
+    Every file is written to a temporary name and renamed into place, the manifest
+    last. The manifest records the chunk count and the SHA-256 of the chunks and
+    embeddings files, so `load_ingest_state` rejects a state left half-written by a
+    crash instead of reusing misaligned rows.
+
+    Returns:
+        Path: The state directory.
+    """
+    state_dir = Path(state_dir)
+    state_dir.mkdir(parents=True, exist_ok=True)
+    chunks_path, embeddings_path = state_dir / CHUNKS_FILE, state_dir / EMBEDDINGS_FILE
+
+    tmp_path = chunks_path.with_name(chunks_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f_out:
+        for chunk in chunks:
+            json.dump(dict(chunk), f_out, ensure_ascii=False)
+            f_out.write("\n")
+    os.replace(tmp_path, chunks_path)
+
+    tmp_path = embeddings_path.with_name(embeddings_path.name + ".tmp")
+    with tmp_path.open("wb") as f_out:
+        np.save(f_out, embeddings)
+    os.replace(tmp_path, embeddings_path)
+
+    manifest = {
+        "params": params,
+        "files": files,
+        "count": len(chunks),
+        "chunks_sha256": _file_sha256(chunks_path),
+        "embeddings_sha256": _file_sha256(embeddings_path),
+    }
+    tmp_path = state_dir / (MANIFEST_FILE + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f_out:
+        json.dump(manifest, f_out, indent=2)
+    os.replace(tmp_path, state_dir / MANIFEST_FILE)
+
+    return state_dir
+
+
+def incremental_ingest(
+    docs: Iterable[Dict[str, Any]],
+    state_dir: Path,
+    model: Any,
+    method: str,
+    size: int = 2000,
+    step: int = 1000,
+    level: int = 2,
+    model_name: str = "multi-qa-distilbert-cos-v1",
+    min_size: int = 200,
+    **embed_kwargs: Any,
+) -> Tuple[List[Dict[str, Any]], np.ndarray, Dict[str, List[str]]]:
+    """
+    Re-ingest a repository, reprocessing only the files that changed since the last run.
+
+    Per-file content hashes are compared against the manifest in `state_dir`.
+    Chunks (and their embedding rows) of unchanged files are reused, chunks of
+    deleted files are dropped, and only added or modified files are chunked and
+    embedded. If there is no previous state, or it was built with different
+    chunking parameters or embedding model, everything is rebuilt.
+
+    Args:
+        docs: Iterable of parsed documents (e.g. from `iter_repo_documents`).
+        state_dir: Directory holding the previous ingest state; updated in place.
+        model: Preloaded SentenceTransformer model.
+        method: Chunking method passed to `chunk_text`.
+        size: Chunk size (for simple/sliding).
+        step: Step size (for sliding).
+        level: Markdown header level (for section).
+        model_name: Name of `model`, recorded in the manifest.
+        min_size: Minimum chunk size (for recursive).
+        **embed_kwargs: Passed to `embed_chunks` for the new chunks (e.g. `cache`,
+            `batch_size`, `max_batch_tokens`, `workers`, `backend`, `progress`).
+
+    Returns:
+        Tuple of (chunks, embeddings, diff) where `diff` lists added, modified,
+        deleted and unchanged filenames. `embeddings[i]` belongs to `chunks[i]`.
+    """
+    params = {
+        "method": method,
+        "size": size,
+        "step": step,
+        "level": level,
+        "min_size": min_size,
+        "model": model_name,
+    }
+
+    state = load_ingest_state(state_dir)
+    if state is None or state["params"] != params:
+        state = {"files": {}, "chunks": [], "embeddings": None}
+
+    files: Dict[str, str] = {}
+    new_chunks: List[Dict[str, Any]] = []
+    for doc in docs:
+        filename = doc.get("filename")
+        files[filename] = document_hash(doc)
+        if state["files"].get(filename) == files[filename]:
+            continue
+        for c in chunk_text(doc.get("content", ""), method=method, size=size, step=step, level=level,
+                            min_size=min_size):
+            c["filename"] = filename
+            new_chunks.append(c)
+
+    diff = diff_manifests(state["files"], files)
+    unchanged = set(diff["unchanged"])
+
+    keep = [i for i, c in enumerate(state["chunks"]) if c.get("filename") in unchanged]
+    chunks = [state["chunks"][i] for i in keep] + new_chunks
+
+    parts = []
+    if keep:
+        parts.append(state["embeddings"][keep])
+    if new_chunks:
+        parts.append(embed_chunks(new_chunks, model, **embed_kwargs))
+    embeddings = np.vstack(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+
+    save_ingest_state(state_dir, params, files, chunks, embeddings)
+    return chunks, embeddings, diff
@@ -0,0 +1,166 @@
+import os
+import asyncio
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union
+
+import httpx
+
+from .read import (
+    ARCHIVE_CACHE_DIR,
+    DOWNLOAD_CHUNK_SIZE,
+    archive_cache_paths,
+    load_archive_cache_meta,
+    write_archive_cache_meta,
+    parse_archive,
+)
+from .chunks import chunk_corpus
+
+
+def parse_repo_spec(spec: str) -> Dict[str, str]:
+    """
+    Parse an `owner/repo[@branch]` spec.
+
+    Args:
+        spec: Repository spec, e.g. "TheAlgorithms/Python@master". The branch defaults to "main".
+
+    Returns:
+        Dict with `owner`, `repo` and `branch`.
+
+    Raises:
+        ValueError: If the spec is not of the form owner/repo[@branch].
+    """
+    name, _, branch = spec.partition("@")
+    owner, _, repo = name.partition("/")
+    if not owner or not repo or "/" in repo:
+        raise ValueError(f"Invalid repository spec (expected owner/repo[@branch]): {spec}")
+    return {"owner": owner, "repo": repo, "branch": branch or "main"}
+
+
+async def _fetch_archive_async(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    spec: Dict[str, str],
+    prefix: str,
+    cache_dir: Path,
+) -> Path:
+    """
+    Download one repository archive into the archive cache, revalidating with If-None-Match.
+
+    Uses the same cache layout as `core.read.fetch_repo_archive`.
+    """
+    archive_path, meta_path = archive_cache_paths(cache_dir, spec["owner"], spec["repo"], spec["branch"])
+    meta = load_archive_cache_meta(archive_path, meta_path)
+
+    url = f"{prefix}/{spec['owner']}/{spec['repo']}/zip/refs/heads/{spec['branch']}"
+    headers = {"If-None-Match": meta["etag"]} if meta.get("etag") else {}
+
+    async with semaphore:
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and meta:
+                return archive_path
+            if response.status_code != 200:
+                raise Exception(f"Failed to download repository {spec['owner']}/{spec['repo']}: "
+                                f"{response.status_code}")
+
+            archive_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=archive_path.parent, suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as f_out:
+                    async for block in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        # Disk writes run in a thread so they do not stall the other downloads.
+                        await asyncio.to_thread(f_out.write, block)
+                os.replace(tmp_name, archive_path)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+
+            write_archive_cache_meta(meta_path, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "sha": None,
+            })
+
+    return archive_path
+
+
+async def fetch_archives_async(
+    specs: List[Dict[str, str]],
+    prefix: str = "https://codeload.github.com",
+    cache_dir: Union[str, Path] = ARCHIVE_CACHE_DIR,
+    max_connections: int = 8,
+    timeout: float = 300.0,
+) -> List[Path]:
+    """
+    Download several repository archives concurrently over one pooled async HTTP client.
+
+    At most `max_connections` downloads are in flight at once; keep-alive connections
+    to the archive host are reused across repositories.
+
+    Args:
+        specs: Parsed repository specs (see `parse_repo_spec`).
+        prefix: Base URL of the archive host (a local fixture server in tests).
+        cache_dir: Root directory of the archive cache.
+        max_connections: Upper bound on concurrent downloads / pooled connections.
+        timeout: Per-request timeout in seconds.
+
+    Returns:
+        List of archive paths, in the same order as `specs`.
+    """
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    semaphore = asyncio.Semaphore(max_connections)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True) as client:
+        tasks = [_fetch_archive_async(client, semaphore, spec, prefix, Path(cache_dir)) for spec in specs]
+        return await asyncio.gather(*tasks)
+
+
+def ingest_repositories(
+    specs: List[Union[str, Dict[str, str]]],
+    method: str = "section",
+    size: int = 2000,
+    step: int = 1000,
+    level: int = 2,
+    prefix: str = "https://codeload.github.com",
+    cache_dir: Union[str, Path] = ARCHIVE_CACHE_DIR,
+    max_connections: int = 8,
+    workers: Optional[int] = None,
+    min_size: int = 200,
+) -> List[Dict[str, Any]]:
+    """
+    Ingest several repositories into one combined chunk corpus.
+
+    Archives are downloaded concurrently (`fetch_archives_async`), parsed in a
+    process pool (one archive per task), then chunked with `chunk_corpus` across the
+    same number of processes. Every chunk is tagged with
+    `repo` ("owner/repo") and `branch` so results can be traced or filtered per repository.
+
+    Args:
+        specs: Repository specs as "owner/repo[@branch]" strings or parsed dicts.
+        method: Chunking method passed to `chunk_text`.
+        size: Chunk size (for simple/sliding).
+        step: Step size (for sliding).
+        level: Markdown header level (for section).
+        prefix: Base URL of the archive host.
+        cache_dir: Root directory of the archive cache.
+        max_connections: Upper bound on concurrent downloads.
+        workers: Number of parsing and chunking processes (default: os.cpu_count()).
+        min_size: Minimum chunk size (for recursive).
+
+    Returns:
+        List of chunk dicts, grouped by repository in the order of `specs`.
+    """
+    specs = [parse_repo_spec(s) if isinstance(s, str) else s for s in specs]
+    archive_paths = asyncio.run(fetch_archives_async(specs, prefix, cache_dir, max_connections))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parsed = list(executor.map(parse_archive, archive_paths))
+
+    all_chunks: List[Dict[str, Any]] = []
+    for spec, docs in zip(specs, parsed):
+        for c in chunk_corpus(docs, method=method, size=size, step=step, level=level, workers=workers,
+                              min_size=min_size):
+            c["repo"] = f"{spec['owner']}/{spec['repo']}"
+            c["branch"] = spec["branch"]
+            all_chunks.append(c)
+    return all_chunks
@@ -1,17 +1,434 @@
-import io
+import os
+import json
+import mmap
+import tempfile
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 import requests
 import frontmatter
 
-def read_repo_data(repo_owner, repo_name, prefix="https://codeload.github.com", branch="main"):
+# Size of each block pulled from the HTTP response while streaming the archive.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Archives smaller than this stay in memory, larger ones roll over to a temp file on disk.
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+# Persistent archive cache shared across processes (override with AIHERO_ARCHIVE_CACHE).
+ARCHIVE_CACHE_DIR = Path(
+    os.getenv("AIHERO_ARCHIVE_CACHE", Path.home() / ".cache" / "aihero" / "archives")
+)
+GITHUB_API_PREFIX = "https://api.github.com"
+
+
+def download_repo_archive(url, chunk_size=DOWNLOAD_CHUNK_SIZE, spool_max_size=SPOOL_MAX_SIZE):
+    """
+    Streams a zip archive from `url` into a spooled temporary file.
+
+    The response body is consumed in `chunk_size` blocks, so the archive is never held in memory
+    as a single bytes object. Once more than `spool_max_size` bytes have been written, the spool
+    transparently moves to a temporary file on disk.
+
+    Args:
+        url (str): The archive download URL.
+        chunk_size (int): Number of bytes read from the response per iteration.
+        spool_max_size (int): In-memory threshold before the archive is spilled to disk.
+
+    Returns:
+        tempfile.SpooledTemporaryFile: A seekable file object positioned at the start of the archive.
+            The caller is responsible for closing it.
+
+    Raises:
+        Exception: If the repository cannot be downloaded (non-200 HTTP response).
+    """
+    with requests.get(url, stream=True) as response:
+        if response.status_code != 200:
+            raise Exception(f"Failed to download repository: {response.status_code}")
+
+        archive = tempfile.SpooledTemporaryFile(max_size=spool_max_size)
+        try:
+            for block in response.iter_content(chunk_size=chunk_size):
+                archive.write(block)
+        except Exception:
+            archive.close()
+            raise
+
+    archive.seek(0)
+    return archive
+
+
+def resolve_branch_sha(repo_owner, repo_name, branch="main", api_prefix=GITHUB_API_PREFIX):
+    """
+    Looks up the commit SHA a branch currently points to.
+
+    Uses the GitHub commits endpoint with the `application/vnd.github.sha` media type, which returns
+    the bare SHA as text. Any failure (rate limit, network error, unknown API) returns None so callers
+    can fall back to ETag revalidation.
+
+    Args:
+        repo_owner (str): The owner of the GitHub repository.
+        repo_name (str): The name of the GitHub repository.
+        branch (str): The branch to resolve.
+        api_prefix (str): Base URL of the GitHub REST API.
+
+    Returns:
+        str | None: The 40-character commit SHA, or None if it could not be resolved.
+    """
+    url = f"{api_prefix}/repos/{repo_owner}/{repo_name}/commits/{branch}"
+    try:
+        response = requests.get(url, headers={"Accept": "application/vnd.github.sha"}, timeout=10)
+    except requests.RequestException:
+        return None
+
+    sha = response.text.strip()
+    if response.status_code != 200 or len(sha) != 40:
+        return None
+    return sha
+
+
+def fetch_repo_archive(
+    repo_owner,
+    repo_name,
+    branch="main",
+    prefix="https://codeload.github.com",
+    api_prefix=GITHUB_API_PREFIX,
+    cache_dir=ARCHIVE_CACHE_DIR,
+    chunk_size=DOWNLOAD_CHUNK_SIZE,
+):
+    """
+    Returns the path to a locally cached zip archive of a repository branch.
+
+    The cache is keyed by owner/repo/branch, and each entry records the commit SHA and ETag of the
+    archive it holds. Revalidation happens in two steps:
+
+    1. If `api_prefix` is set, the branch head SHA is looked up. A match with the cached SHA returns
+       the cached archive without touching codeload.
+    2. Otherwise a conditional GET is sent with `If-None-Match`. A 304 response keeps the cached
+       archive; a 200 response streams the new archive to disk and replaces the entry atomically.
+
+    Both `prefix` and `api_prefix` can point to a local HTTP server standing in for GitHub.
+
+    Args:
+        repo_owner (str): The owner of the GitHub repository.
+        repo_name (str): The name of the GitHub repository.
+        branch (str): The branch to download.
+        prefix (str): Base URL of the archive host.
+        api_prefix (str | None): Base URL of the GitHub API used for SHA lookups (None disables it).
+        cache_dir (str | Path): Root directory of the archive cache.
+        chunk_size (int): Number of bytes read from the response per iteration.
+
+    Returns:
+        Path: Path to the cached zip archive.
+
+    Raises:
+        Exception: If the repository cannot be downloaded (non-200/304 HTTP response).
+    """
+    archive_path, meta_path = archive_cache_paths(cache_dir, repo_owner, repo_name, branch)
+    entry_dir = archive_path.parent
+    meta = load_archive_cache_meta(archive_path, meta_path)
+
+    sha = resolve_branch_sha(repo_owner, repo_name, branch, api_prefix) if api_prefix else None
+    if sha and meta.get("sha") == sha:
+        return archive_path
+
+    url = f"{prefix}/{repo_owner}/{repo_name}/zip/refs/heads/{branch}"
+    headers = {"If-None-Match": meta["etag"]} if meta.get("etag") else {}
+
+    with requests.get(url, headers=headers, stream=True) as response:
+        if response.status_code == 304 and meta:
+            if sha and meta.get("sha") != sha:
+                meta["sha"] = sha
+                write_archive_cache_meta(meta_path, meta)
+            return archive_path
+
+        if response.status_code != 200:
+            raise Exception(f"Failed to download repository: {response.status_code}")
+
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=entry_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f_out:
+                for block in response.iter_content(chunk_size=chunk_size):
+                    f_out.write(block)
+            os.replace(tmp_name, archive_path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+        write_archive_cache_meta(meta_path, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "sha": sha,
+        })
+
+    return archive_path
+
+
+def archive_cache_paths(cache_dir, repo_owner, repo_name, branch):
+    """Return the (archive, metadata) paths of the cache entry for owner/repo/branch."""
+    entry_dir = Path(cache_dir) / repo_owner.lower() / repo_name.lower() / branch
+    return entry_dir / "archive.zip", entry_dir / "meta.json"
+
+
+def load_archive_cache_meta(archive_path, meta_path):
+    """Return the metadata of a cache entry, or an empty dict if the entry is incomplete."""
+    if not (archive_path.exists() and meta_path.exists()):
+        return {}
+    with meta_path.open("r", encoding="utf-8") as f_in:
+        return json.load(f_in)
+
+
+def write_archive_cache_meta(meta_path, meta):
+    """Atomically write the metadata of a cache entry."""
+    tmp_path = meta_path.with_suffix(".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f_out:
+        json.dump(meta, f_out)
+    os.replace(tmp_path, meta_path)
+
+
+def _is_markdown(filename):
+    """Return True for the Markdown members we ingest (.md / .mdx)."""
+    filename = filename.lower()
+    return filename.endswith('.md') or filename.endswith('.mdx')
+
+
+def _parse_markdown_member(zf, file_info):
+    """
+    Read one archive member and parse its frontmatter.
+
+    Returns:
+        dict | None: The parsed document, or None if the member could not be processed.
+    """
+    filename = file_info.filename.lower()
+    try:
+        with zf.open(file_info) as f_in:
+            content = f_in.read().decode("utf-8", errors="ignore")
+            post = frontmatter.loads(content)
+            data = post.to_dict()
+            data['filename'] = filename
+            return data
+    except Exception as e:
+        print(f"Error processing {filename}: {e}")
+        return None
+
+
+def _parse_markdown_file(path, filename):
+    """
+    Read one file from disk through a read-only memory map and parse its frontmatter.
+
+    Returns:
+        dict | None: The parsed document, or None if the file could not be processed.
+    """
+    try:
+        with open(path, "rb") as f_in:
+            if os.fstat(f_in.fileno()).st_size == 0:
+                content = ""
+            else:
+                # Decode straight from the mapped pages; slicing the map would copy the file first.
+                with mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                    content = str(view, "utf-8", errors="ignore")
+        post = frontmatter.loads(content)
+        data = post.to_dict()
+        data['filename'] = filename
+        return data
+    except Exception as e:
+        print(f"Error processing {filename}: {e}")
+        return None
+
+
+def iter_local_documents(root, skip_dirs=(".git", "node_modules", ".venv")):
+    """
+    Lazily yields the parsed Markdown (.md, .mdx) documents of a local directory, e.g. a git checkout.
+
+    Applies the same filtering as the archive reader, without network access or decompression.
+    Files are read through `mmap`, and filenames are lowercased and prefixed with the directory name
+    (`<root-name>/<relative/path>.md`) so they look like archive member names.
+
+    Args:
+        root (str | Path): Directory to walk.
+        skip_dirs (tuple): Directory names that are not descended into.
+
+    Yields:
+        dict: The parsed frontmatter data, `content` and `filename` of a Markdown file.
+
+    Raises:
+        NotADirectoryError: If `root` is not a directory.
+    """
+    root = Path(root).resolve()
+    if not root.is_dir():
+        raise NotADirectoryError(f"Not a directory: {root}")
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Sort in place so the walk order (and output order) is deterministic.
+        dirnames[:] = sorted(d for d in dirnames if d not in skip_dirs)
+        for name in sorted(filenames):
+            if not _is_markdown(name):
+                continue
+            path = Path(dirpath) / name
+            filename = f"{root.name}/{path.relative_to(root).as_posix()}".lower()
+            data = _parse_markdown_file(path, filename)
+            if data is not None:
+                yield data
+
+
+# Archive opened once per worker process by `_init_parse_worker`.
+_worker_zipfile = None
+
+
+def _init_parse_worker(archive_path):
+    """Process pool initializer: open the archive by path so members never cross process boundaries."""
+    global _worker_zipfile
+    _worker_zipfile = zipfile.ZipFile(archive_path)
+
+
+def _parse_member_batch(member_names):
+    """Parse a batch of members from the archive opened by `_init_parse_worker`."""
+    return [_parse_markdown_member(_worker_zipfile, _worker_zipfile.getinfo(name)) for name in member_names]
+
+
+def parse_archive(archive_path):
+    """
+    Parses every Markdown member of a zip archive on disk in the calling process.
+
+    Top-level so it can be submitted to a process pool, one archive per task.
+
+    Returns:
+        list: Parsed documents in archive order.
+    """
+    with zipfile.ZipFile(archive_path) as zf:
+        docs = (_parse_markdown_member(zf, info) for info in zf.infolist() if _is_markdown(info.filename))
+        return [doc for doc in docs if doc is not None]
+
+
+def iter_archive_parallel(archive_path, workers=None, batch_size=64):
+    """
+    Parses the Markdown members of a zip archive across a pool of worker processes.
+
+    Each worker opens the archive from `archive_path` itself, so only member names and parsed
+    documents are pickled. Batches are submitted with `Executor.map`, so results come back in
+    archive order, exactly like the serial path, and are yielded as soon as each batch is done.
+
+    Args:
+        archive_path (str | Path): Path to the zip archive on disk.
+        workers (int | None): Number of worker processes (default: os.cpu_count()).
+        batch_size (int): Number of members handed to a worker per task.
+
+    Yields:
+        dict: Parsed documents in archive order.
+    """
+    with zipfile.ZipFile(archive_path) as zf:
+        names = [info.filename for info in zf.infolist() if _is_markdown(info.filename)]
+
+    batches = [names[i:i + batch_size] for i in range(0, len(names), batch_size)]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_parse_worker,
+        initargs=(str(archive_path),),
+    ) as executor:
+        for batch in executor.map(_parse_member_batch, batches):
+            yield from (doc for doc in batch if doc is not None)
+
+
+def parse_archive_parallel(archive_path, workers=None, batch_size=64):
+    """
+    Parses the Markdown members of a zip archive across a pool of worker processes.
+
+    See `iter_archive_parallel`.
+
+    Returns:
+        list: Parsed documents in archive order.
+    """
+    return list(iter_archive_parallel(archive_path, workers, batch_size))
+
+
+def iter_repo_documents(
+    repo_owner,
+    repo_name,
+    prefix="https://codeload.github.com",
+    branch="main",
+    cache_dir=ARCHIVE_CACHE_DIR,
+    api_prefix=GITHUB_API_PREFIX,
+    workers=1,
+):
+    """
+    Lazily yields the parsed Markdown (.md, .mdx) documents of a GitHub repository.
+
+    The archive is streamed to disk and members are decompressed one at a time, so peak memory depends
+    on the largest Markdown file rather than on the size of the archive. With `cache_dir` set, the archive
+    is kept in a persistent cache and only downloaded again when the branch has moved
+    (see `fetch_repo_archive`); with `cache_dir=None` it goes to a spooled temporary file.
+
+    With `workers > 1`, frontmatter parsing is spread over a process pool (see `iter_archive_parallel`).
+    The output order is the same as in serial mode.
+
+    Documents are produced one by one, so downstream stages (chunking, indexing) can consume them
+    while the rest of the archive is still being parsed.
+
+    Args:
+        repo_owner (str): The owner of the GitHub repository.
+        repo_name (str): The name of the GitHub repository.
+        prefix (str): The URL prefix to construct the download link (e.g., "https://github.com").
+        branch (str): The branch to download (default: "main").
+        cache_dir (str | Path | None): Root of the persistent archive cache, or None to disable caching.
+        api_prefix (str | None): GitHub API base URL used to look up the branch SHA (None disables it).
+        workers (int): Number of parsing processes (default: 1, parse in the calling process).
+
+    Yields:
+        dict: The parsed frontmatter data, `content` and `filename` of a Markdown file.
+
+    Raises:
+        Exception: If the repository cannot be downloaded (non-200 HTTP response).
+    """
+
+    if workers > 1:
+        # Workers open the archive by path, so it must live in a real file.
+        if cache_dir is not None:
+            archive_path = fetch_repo_archive(repo_owner, repo_name, branch, prefix, api_prefix, cache_dir)
+            yield from iter_archive_parallel(archive_path, workers)
+            return
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            archive_path = fetch_repo_archive(repo_owner, repo_name, branch, prefix, None, tmp_dir)
+            yield from iter_archive_parallel(archive_path, workers)
+        return
+
+    if cache_dir is not None:
+        archive = open(fetch_repo_archive(repo_owner, repo_name, branch, prefix, api_prefix, cache_dir), "rb")
+    else:
+        archive = download_repo_archive(f"{prefix}/{repo_owner}/{repo_name}/zip/refs/heads/{branch}")
+
+    with archive, zipfile.ZipFile(archive) as zf:
+        # Iterate through each file in the zip
+        for file_info in zf.infolist():
+            # Get md or mdx files only
+            if not _is_markdown(file_info.filename):
+                continue
+            data = _parse_markdown_member(zf, file_info)
+            if data is not None:
+                yield data
+
+
+def read_repo_data(
+    repo_owner,
+    repo_name,
+    prefix="https://codeload.github.com",
+    branch="main",
+    cache_dir=ARCHIVE_CACHE_DIR,
+    api_prefix=GITHUB_API_PREFIX,
+    workers=1,
+):
     """
     Downloads and extracts Markdown (.md, .mdx) files from a GitHub repository's main branch zip archive,
     parses their frontmatter, and returns a list of dictionaries containing the parsed data and filenames.
 
+    Eager wrapper around `iter_repo_documents`; see there for caching and parallel parsing.
+
     Args:
         repo_owner (str): The owner of the GitHub repository.
         repo_name (str): The name of the GitHub repository.
         prefix (str): The URL prefix to construct the download link (e.g., "https://github.com").
+        branch (str): The branch to download (default: "main").
+        cache_dir (str | Path | None): Root of the persistent archive cache, or None to disable caching.
+        api_prefix (str | None): GitHub API base URL used to look up the branch SHA (None disables it).
+        workers (int): Number of parsing processes (default: 1, parse in the calling process).
 
     Returns:
         list: A list of dictionaries, each containing the parsed frontmatter data and filename of a Markdown file.
@@ -19,31 +436,4 @@ def read_repo_data(repo_owner, repo_name, prefix="https://codeload.github.com",
     Raises:
         Exception: If the repository cannot be downloaded (non-200 HTTP response).
     """
-
-    url = f"{prefix}/{repo_owner}/{repo_name}/zip/refs/heads/{branch}"
-    response = requests.get(url)
-
-    if response.status_code != 200:
-        raise Exception(f"Failed to download repository: {response.status_code}")
-
-    repository_data = []
-    zf = zipfile.ZipFile(io.BytesIO(response.content))
-    # Iterate through each file in the zip
-    for file_info in zf.infolist():
-        filename = file_info.filename.lower()
-        # Get md or mdx files only
-        if not (filename.endswith('.md') or filename.endswith('.mdx')):
-            continue
-        try:
-            # Read and parse each file
-            with zf.open(file_info) as f_in:
-                content = f_in.read().decode("utf-8", errors="ignore")
-                post = frontmatter.loads(content)
-                data = post.to_dict()
-                data['filename'] = filename
-                repository_data.append(data)
-        except Exception as e:
-            print(f"Error processing {filename}: {e}")
-            continue
-    zf.close()
-    return repository_data
+    return list(iter_repo_documents(repo_owner, repo_name, prefix, branch, cache_dir, api_prefix, workers))
@@ -1,8 +1,38 @@
-from typing import List, Dict, Any, Union
-from minsearch import Index, VectorSearch
-from sentence_transformers import SentenceTransformer
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple, Union
 import numpy as np
 
+from .embedding import ProgressCallback, batched_encode, parallel_encode
+from .embedding_cache import EmbeddingCache, QueryEmbeddingCache, encode_with_cache
+from .ann import IVFVectorSearch
+
+# minsearch (scikit-learn, scipy) and sentence_transformers (torch) take seconds to
+# import, so they are imported where they are first used; text-only paths never load torch.
+if TYPE_CHECKING:
+    from minsearch import Index, VectorSearch
+    from sentence_transformers import SentenceTransformer
+
+DEFAULT_EMBEDDING_MODEL = "multi-qa-distilbert-cos-v1"
+
+# "torch" (SentenceTransformer default), "onnx" (ONNX Runtime export) or
+# "onnx-int8" (ONNX export with dynamic int8 quantization, fastest on CPU).
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+EMBEDDING_BACKEND = os.environ.get("AIHERO_EMBEDDING_BACKEND", "torch")
+# Target instruction set of the int8 export: "avx2", "avx512", "avx512_vnni" or "arm64".
+ONNX_QUANTIZATION = os.environ.get("AIHERO_ONNX_QUANTIZATION", "avx2")
+ONNX_MODEL_DIR = Path(os.environ.get("AIHERO_ONNX_MODEL_DIR", Path.home() / ".cache" / "aihero" / "onnx"))
+
+# "exact" (minsearch.VectorSearch, brute force) or "ivf" (core.ann.IVFVectorSearch).
+VECTOR_INDEX_TYPES = ("exact", "ivf")
+
+# Process-wide registry: each (model name, backend) is loaded once and shared.
+_models: Dict[Tuple[str, str], SentenceTransformer] = {}
+_models_lock = threading.Lock()
+
 
 def create_text_index(
     chunks: List[Dict[str, Any]],
@@ -20,6 +50,8 @@ def create_text_index(
     Returns:
         Index: The created text index.
     """
+    from minsearch import Index
+
     index = Index(
         text_fields=text_fields,
         keyword_fields=keyword_fields,
@@ -27,11 +59,131 @@ def create_text_index(
     return index.fit(chunks)
 
 
-def load_embedding_model(model_name: str = "multi-qa-distilbert-cos-v1") -> SentenceTransformer:
-    """Load and return a SentenceTransformer embedding model."""
+def embedding_model_key(model_name: str = DEFAULT_EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND) -> str:
+    """
+    Identify the vectors a model produces, for the embedding cache and saved embeddings.
+
+    The ONNX export reproduces torch embeddings, so both share the model name;
+    int8 vectors differ slightly and are kept apart.
+    """
+    return f"{model_name}@{backend}" if backend == "onnx-int8" else model_name
+
+
+def _onnx_model_kwargs(threads: Optional[int]) -> Dict[str, Any]:
+    """ONNX Runtime session options capping intra-op threads, or no options when threads is None."""
+    if threads is None:
+        return {}
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    return {"session_options": options}
+
+
+def _quantized_onnx_model(model_name: str, threads: Optional[int] = None) -> SentenceTransformer:
+    """Load the int8 ONNX variant of a model, exporting and quantizing it on first use."""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    local_dir = ONNX_MODEL_DIR / model_name.replace("/", "__")
+    file_name = f"onnx/model_qint8_{ONNX_QUANTIZATION}.onnx"
+    if not (local_dir / file_name).exists():
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save_pretrained(str(local_dir))
+        export_dynamic_quantized_onnx_model(model, ONNX_QUANTIZATION, str(local_dir))
+    return SentenceTransformer(
+        str(local_dir),
+        backend="onnx",
+        model_kwargs={"file_name": file_name, **_onnx_model_kwargs(threads)},
+    )
+
+
+def _load_model(model_name: str, backend: str, threads: Optional[int] = None) -> SentenceTransformer:
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx-int8":
+        return _quantized_onnx_model(model_name, threads)
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs=_onnx_model_kwargs(threads))
     return SentenceTransformer(model_name)
 
 
+def load_embedding_model(
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+    backend: str = EMBEDDING_BACKEND,
+    threads: Optional[int] = None,
+) -> SentenceTransformer:
+    """
+    Return the SentenceTransformer embedding model, loading it on first use.
+
+    Models are kept in a process-wide registry keyed by (model_name, backend), so
+    every index, tool and Streamlit session shares one instance. Loading happens
+    under a lock, so concurrent first calls load the model only once.
+
+    Args:
+        model_name: Hugging Face model name or local path.
+        backend: "torch", "onnx" or "onnx-int8" (default: $AIHERO_EMBEDDING_BACKEND or
+            "torch"). The ONNX backends need `sentence-transformers[onnx]`; the int8
+            model is exported once to $AIHERO_ONNX_MODEL_DIR.
+        threads: Intra-op threads of the ONNX Runtime session (default: one per
+            core). Applies when the model is first loaded; torch threads are set
+            with `torch.set_num_threads`.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}. Use one of {EMBEDDING_BACKENDS}.")
+    key = (model_name, backend)
+    with _models_lock:
+        if key not in _models:
+            _models[key] = _load_model(model_name, backend, threads)
+        return _models[key]
+
+
+def check_backend_parity(
+    texts: List[str],
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+    backend: str = EMBEDDING_BACKEND,
+    top_k: int = 5,
+) -> Dict[str, float]:
+    """
+    Compare a backend's embeddings with the torch reference on sample texts.
+
+    Args:
+        texts: Sample texts (e.g. a few hundred chunks).
+        model_name: Model to compare.
+        backend: Backend to check against "torch".
+        top_k: Neighbourhood size for the retrieval agreement.
+
+    Returns:
+        Dict with the mean and min cosine similarity between matching rows, and the
+        mean overlap of each text's top_k nearest neighbours (excluding itself) under
+        both backends.
+    """
+    reference = batched_encode(texts, load_embedding_model(model_name, "torch"))
+    candidate = batched_encode(texts, load_embedding_model(model_name, backend))
+
+    def normalize(m: np.ndarray) -> np.ndarray:
+        return m / np.maximum(np.linalg.norm(m, axis=1, keepdims=True), 1e-12)
+
+    reference, candidate = normalize(reference), normalize(candidate)
+    cosine = np.sum(reference * candidate, axis=1)
+
+    def neighbours(m: np.ndarray, k: int) -> np.ndarray:
+        similarity = m @ m.T
+        # Each text is its own nearest neighbour; leave it out so it does not inflate the overlap.
+        np.fill_diagonal(similarity, -np.inf)
+        return np.argsort(-similarity, axis=1)[:, :k]
+
+    k = max(1, min(top_k, len(texts) - 1))
+    ref_top, cand_top = neighbours(reference, k), neighbours(candidate, k)
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)]
+
+    return {
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        f"top{k}_overlap": float(np.mean(overlap)),
+    }
+
+
 def embed_text(
     text: Union[str, List[str]],
     model: SentenceTransformer,
@@ -49,24 +201,97 @@ def embed_text(
     return model.encode(text, convert_to_numpy=True)
 
 
+def embed_chunks(
+    chunks: List[Dict[str, Any]],
+    model: SentenceTransformer,
+    text_field: str = "chunk",
+    cache: Optional[EmbeddingCache] = None,
+    batch_size: int = 32,
+    max_batch_tokens: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    workers: int = 1,
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+    backend: str = EMBEDDING_BACKEND,
+) -> np.ndarray:
+    """
+    Embed the text of every chunk in length-bucketed batches (see `core.embedding`).
+
+    Args:
+        chunks: Chunks to embed.
+        model: Preloaded SentenceTransformer model.
+        text_field: Field of the chunk to embed.
+        cache: Persistent embedding cache for `model`; only texts missing from it are encoded.
+        batch_size: Maximum texts per encode batch.
+        max_batch_tokens: Cap on padded tokens per batch, bounding peak memory.
+        progress: Called as `progress(done, total)` while encoding (cache misses only).
+        workers: Embedding processes; above 1, batches are encoded by a process pool
+            (see `core.embedding.parallel_encode`) in which each worker loads `model_name`.
+        model_name: Name of `model`, loaded by the pool workers.
+        backend: Backend of `model`, used by the pool workers.
+
+    Returns:
+        float32 array with one row per chunk.
+    """
+    texts = [c[text_field] for c in chunks]
+
+    def encode(batch: List[str]) -> np.ndarray:
+        if workers > 1:
+            return parallel_encode(batch, model_name, workers, batch_size, max_batch_tokens, progress,
+                                   max_seq_length=getattr(model, "max_seq_length", None) or 512,
+                                   backend=backend)
+        return batched_encode(batch, model, batch_size, max_batch_tokens, progress)
+
+    if cache is not None:
+        return encode_with_cache(texts, cache, encode)
+    return encode(texts)
+
+
 def create_vector_index(
     chunks: List[Dict[str, Any]],
     model: SentenceTransformer,
     text_field: str = "chunk",
-) -> VectorSearch:
+    embeddings: Optional[np.ndarray] = None,
+    cache: Optional[EmbeddingCache] = None,
+    batch_size: int = 32,
+    max_batch_tokens: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    workers: int = 1,
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+    backend: str = EMBEDDING_BACKEND,
+    index_type: str = "exact",
+    n_lists: Optional[int] = None,
+    nprobe: int = 16,
+) -> Union[VectorSearch, IVFVectorSearch]:
     """
-    Create a vector index using minsearch.VectorSearch.
+    Create a vector index using minsearch.VectorSearch or the approximate IVF index.
 
     Args:
         chunks: The data to be indexed.
         model: Preloaded SentenceTransformer model.
         text_field: Field of the chunk to embed.
+        embeddings: Precomputed embeddings aligned with `chunks` (e.g. memory-mapped
+            by `utils.utils.load_embeddings`); skips encoding when given.
+        cache: Persistent embedding cache for `model`; only texts missing from it are encoded.
+        batch_size, max_batch_tokens, progress, workers, model_name, backend: See `embed_chunks`.
+        index_type: "exact" for brute-force search, "ivf" for approximate search that
+            scales to hundreds of thousands of chunks.
+        n_lists, nprobe: IVF list count (default ~sqrt(len(chunks))) and lists scanned
+            per query; higher nprobe means better recall and slower queries.
 
     Returns:
-        VectorSearch object fitted with embeddings and chunks.
+        Vector index fitted with embeddings and chunks; both expose
+        `search(query_vector, num_results=...)`.
     """
-    texts = [c[text_field] for c in chunks]
-    embeddings = embed_text(texts, model)
+    if index_type not in VECTOR_INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type: {index_type}. Use one of {VECTOR_INDEX_TYPES}.")
+    if embeddings is None:
+        embeddings = embed_chunks(chunks, model, text_field, cache, batch_size, max_batch_tokens, progress,
+                                  workers, model_name, backend)
+    if index_type == "ivf":
+        return IVFVectorSearch(n_lists=n_lists, nprobe=nprobe).fit(embeddings, chunks)
+
+    from minsearch import VectorSearch
+
     vindex = VectorSearch()
     vindex.fit(embeddings, chunks)
     return vindex
@@ -92,6 +317,7 @@ def vector_search(
     model: SentenceTransformer,
     query: str,
     top_k: int = 5,
+    query_cache: Optional[QueryEmbeddingCache] = None,
 ) -> List[Dict[str, Any]]:
     """
     Search chunks using vector similarity.
@@ -101,11 +327,12 @@ def vector_search(
         model: Preloaded SentenceTransformer model.
         query: Search query.
         top_k: Number of results to return.
+        query_cache: Cache of query embeddings for `model`; repeated queries skip encoding.
 
     Returns:
         List of dicts with scores and chunk metadata.
     """
-    query_vec = embed_text(query, model)
+    query_vec = query_cache.encode(query) if query_cache is not None else embed_text(query, model)
     return vindex.search(query_vec, num_results=top_k)
 
 
@@ -115,6 +342,7 @@ def hybrid_search(
     model: SentenceTransformer,
     query: str,
     top_k: int = 5,
+    query_cache: Optional[QueryEmbeddingCache] = None,
 ) -> List[Dict[str, Any]]:
     """
     Combine text and vector search results, deduplicated by filename+start.
@@ -125,12 +353,13 @@ def hybrid_search(
         model: Preloaded SentenceTransformer model.
         query: Query string.
         top_k: Number of results to return.
+        query_cache: Cache of query embeddings for `model` (see `vector_search`).
 
     Returns:
         List of combined results.
     """
     text_results = text_search(index, query, top_k)
-    vector_results = vector_search(vindex, model, query, top_k)
+    vector_results = vector_search(vindex, model, query, top_k, query_cache)
 
     seen = set()
     merged = []
@@ -0,0 +1,219 @@
+"""
+SQLite catalog of saved chunk snapshots.
+
+One row per saved chunks file, with the repository it came from, the chunking
+strategy and parameters, the chunk count, a content hash and the paths of the
+artifacts saved next to it (embeddings, text index, IVF index). Listing and picking
+snapshots is a single indexed query instead of globbing and parsing filenames.
+
+Paths are stored absolute, so the catalog reads the same from any working directory.
+"""
+import json
+import sqlite3
+import hashlib
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    params TEXT NOT NULL DEFAULT '{}',
+    chunk_count INTEGER NOT NULL,
+    content_hash TEXT,
+    chunks_path TEXT NOT NULL UNIQUE,
+    embeddings_path TEXT,
+    text_index_path TEXT,
+    ann_index_path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_source ON snapshots (owner, repo, branch, strategy);
+CREATE INDEX IF NOT EXISTS idx_snapshots_hash ON snapshots (content_hash);
+"""
+
+_ARTIFACT_COLUMNS = ("embeddings_path", "text_index_path", "ann_index_path")
+# PRAGMA user_version of the catalog; 1 = paths stored absolute.
+_CATALOG_VERSION = 1
+
+
+def _path(path: Union[str, Path]) -> str:
+    return str(Path(path).resolve())
+
+
+def _rebase_relative_paths(conn: sqlite3.Connection, root: Path) -> None:
+    """
+    Make paths written relative to the working directory absolute. Chunk files and
+    their artifacts are saved in the catalog's directory, so they are found by name.
+    """
+    for row in conn.execute("SELECT * FROM snapshots").fetchall():
+        updates = {
+            column: str(root / Path(row[column]).name)
+            for column in ("chunks_path", *_ARTIFACT_COLUMNS)
+            if row[column] is not None and not Path(row[column]).is_absolute()
+        }
+        if updates:
+            assignments = ", ".join(f"{column} = ?" for column in updates)
+            conn.execute(f"UPDATE snapshots SET {assignments} WHERE id = ?", (*updates.values(), row["id"]))
+
+
+def _connect(db_path: Union[str, Path]) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_SCHEMA)
+    # Catalogs created before an artifact column existed get it added in place.
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(snapshots)")}
+    for column in _ARTIFACT_COLUMNS:
+        if column not in columns:
+            conn.execute(f"ALTER TABLE snapshots ADD COLUMN {column} TEXT")
+    if conn.execute("PRAGMA user_version").fetchone()[0] < _CATALOG_VERSION:
+        _rebase_relative_paths(conn, Path(db_path).resolve().parent)
+        conn.execute(f"PRAGMA user_version = {_CATALOG_VERSION}")
+        conn.commit()
+    return conn
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    snapshot = dict(row)
+    snapshot["params"] = json.loads(snapshot["params"])
+    for key in ("chunks_path", *_ARTIFACT_COLUMNS):
+        if snapshot[key] is not None:
+            snapshot[key] = Path(snapshot[key])
+    return snapshot
+
+
+def chunks_content_hash(chunks: Iterable[Dict[str, Any]]) -> str:
+    """SHA-256 over the chunks in order, independent of the on-disk format."""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(json.dumps(dict(chunk), sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def register_snapshot(
+    db_path: Union[str, Path],
+    chunks_path: Union[str, Path],
+    owner: str,
+    repo: str,
+    branch: str,
+    strategy: str,
+    chunk_count: int,
+    params: Optional[Dict[str, Any]] = None,
+    content_hash: Optional[str] = None,
+    created_at: Optional[str] = None,
+) -> int:
+    """
+    Record a saved chunks file in the catalog. Re-registering a path updates its row
+    in place (keeping its id, so `--snapshot <id>` references stay valid) and clears
+    its artifact paths, which belonged to the previous contents.
+
+    Returns:
+        The snapshot id.
+    """
+    with closing(_connect(db_path)) as conn, conn:
+        conn.execute(
+            """
+            INSERT INTO snapshots
+                (created_at, owner, repo, branch, strategy, params, chunk_count, content_hash, chunks_path)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(chunks_path) DO UPDATE SET
+                created_at = excluded.created_at,
+                owner = excluded.owner,
+                repo = excluded.repo,
+                branch = excluded.branch,
+                strategy = excluded.strategy,
+                params = excluded.params,
+                chunk_count = excluded.chunk_count,
+                content_hash = excluded.content_hash,
+                embeddings_path = NULL,
+                text_index_path = NULL,
+                ann_index_path = NULL
+            """,
+            (
+                created_at or datetime.now().isoformat(timespec="seconds"),
+                owner,
+                repo,
+                branch,
+                strategy,
+                json.dumps(params or {}, sort_keys=True),
+                chunk_count,
+                content_hash,
+                _path(chunks_path),
+            ),
+        )
+        (snapshot_id,) = conn.execute("SELECT id FROM snapshots WHERE chunks_path = ?", (_path(chunks_path),)).fetchone()
+        return snapshot_id
+
+
+def update_snapshot_artifacts(db_path: Union[str, Path], chunks_path: Union[str, Path], **artifacts: Any) -> None:
+    """
+    Record artifact paths (`embeddings_path`, `text_index_path`, `ann_index_path`) for a
+    cataloged chunks file.
+    Does nothing if the chunks file is not in the catalog.
+    """
+    unknown = set(artifacts) - set(_ARTIFACT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown snapshot artifacts: {sorted(unknown)}")
+    if not artifacts:
+        return
+
+    assignments = ", ".join(f"{column} = ?" for column in artifacts)
+    values = [_path(p) if p is not None else None for p in artifacts.values()]
+    with closing(_connect(db_path)) as conn, conn:
+        conn.execute(f"UPDATE snapshots SET {assignments} WHERE chunks_path = ?", (*values, _path(chunks_path)))
+
+
+def list_snapshots(
+    db_path: Union[str, Path],
+    owner: Optional[str] = None,
+    repo: Optional[str] = None,
+    branch: Optional[str] = None,
+    strategy: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    List cataloged snapshots, newest first, optionally filtered by source and strategy.
+    """
+    filters = {"owner": owner, "repo": repo, "branch": branch, "strategy": strategy}
+    clauses = [f"{column} = ?" for column, value in filters.items() if value is not None]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    args = [value for value in filters.values() if value is not None]
+
+    with closing(_connect(db_path)) as conn:
+        rows = conn.execute(f"SELECT * FROM snapshots {where} ORDER BY created_at DESC, id DESC", args)
+        return [_row_to_dict(row) for row in rows]
+
+
+def get_snapshot(db_path: Union[str, Path], snapshot_id: int) -> Optional[Dict[str, Any]]:
+    """Return one snapshot by id, or None."""
+    with closing(_connect(db_path)) as conn:
+        row = conn.execute("SELECT * FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+
+def find_snapshot(db_path: Union[str, Path], chunks_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Return the snapshot of a chunks file, or None if it is not cataloged."""
+    with closing(_connect(db_path)) as conn:
+        row = conn.execute("SELECT * FROM snapshots WHERE chunks_path = ?", (_path(chunks_path),)).fetchone()
+        return _row_to_dict(row) if row else None
+
+
+def prune_snapshots(db_path: Union[str, Path]) -> int:
+    """
+    Drop snapshots whose chunks file no longer exists, deleting the artifacts recorded
+    for them (and the `.json` metadata next to the embeddings). Returns the number removed.
+    """
+    with closing(_connect(db_path)) as conn, conn:
+        missing = [row for row in conn.execute("SELECT * FROM snapshots") if not Path(row["chunks_path"]).exists()]
+        for row in missing:
+            for column in _ARTIFACT_COLUMNS:
+                if row[column] is not None:
+                    Path(row[column]).unlink(missing_ok=True)
+            if row["embeddings_path"] is not None:
+                Path(row["embeddings_path"]).with_suffix(".json").unlink(missing_ok=True)
+        conn.executemany("DELETE FROM snapshots WHERE chunks_path = ?", [(row["chunks_path"],) for row in missing])
+        return len(missing)
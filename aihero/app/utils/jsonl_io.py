@@ -0,0 +1,116 @@
+"""
+Streaming JSONL reader/writer for chunk files.
+
+- Uses `orjson` for encoding/decoding when it is installed, stdlib `json` otherwise.
+- Compression is chosen from the file suffix when writing (`.gz` → gzip,
+  `.zst` → zstd, which needs the `zstandard` package) and detected from the
+  magic bytes when reading, so callers never need to know how a file was saved.
+- `iter_jsonl` yields one record at a time, so consumers can start before the
+  whole file has been read.
+"""
+import io
+import gzip
+import json
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd compression
+    zstandard = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise ImportError("zstd-compressed chunk files need the 'zstandard' package (pip install zstandard)")
+
+
+def _compression_for(path: Path) -> Optional[str]:
+    return COMPRESSION_SUFFIXES.get(path.suffix)
+
+
+def _open_read(path: Path) -> BinaryIO:
+    """Open a file for binary reading, transparently decompressing gzip/zstd."""
+    raw = path.open("rb")
+    magic = raw.read(4)
+    raw.seek(0)
+    if magic.startswith(GZIP_MAGIC):
+        raw.close()
+        return gzip.open(path, "rb")
+    if magic == ZSTD_MAGIC:
+        _require_zstandard()
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    return raw
+
+
+def _open_write(path: Path, level: Optional[int]) -> BinaryIO:
+    """Open a file for binary writing, compressing according to its suffix."""
+    compression = _compression_for(path)
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6 if level is None else level)
+    if compression == "zstd":
+        _require_zstandard()
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        return compressor.stream_writer(path.open("wb"), closefd=True)
+    return path.open("wb")
+
+
+def _dumps(record: Dict[str, Any], ensure_ascii: bool) -> bytes:
+    if orjson is not None and not ensure_ascii:
+        return orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(record, ensure_ascii=ensure_ascii).encode("utf-8")
+
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def iter_jsonl(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Stream records from a (possibly gzip/zstd-compressed) JSONL file.
+
+    Args:
+        path: JSONL file; compression is detected from the file contents.
+
+    Yields:
+        One dict per non-empty line.
+    """
+    with _open_read(Path(path)) as f_in:
+        for line in f_in:
+            if line.strip():
+                yield _loads(line)
+
+
+def write_jsonl(
+    records: Iterable[Dict[str, Any]],
+    path: Union[str, Path],
+    ensure_ascii: bool = False,
+    level: Optional[int] = None,
+) -> int:
+    """
+    Stream records to a JSONL file, compressed if the path ends in `.gz` or `.zst`.
+
+    Args:
+        records: Records to write (dicts or mappings such as Chunk views).
+        path: Output file path.
+        ensure_ascii: Escape non-ASCII characters (uses stdlib json).
+        level: Compression level (default: 6 for gzip, 3 for zstd).
+
+    Returns:
+        Number of records written.
+    """
+    count = 0
+    with _open_write(Path(path), level) as f_out:
+        for record in records:
+            f_out.write(_dumps(dict(record), ensure_ascii))
+            f_out.write(b"\n")
+            count += 1
+    return count
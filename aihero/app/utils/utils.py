@@ -1,13 +1,45 @@
+import os
+import re
 import json
+import pickle
 import yaml
-from typing import List, Dict, Any
+import numpy as np
+from importlib.metadata import version
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 import secrets
 from datetime import datetime
 from pathlib import Path
 
+from .jsonl_io import COMPRESSION_SUFFIXES, iter_jsonl, write_jsonl
+from .chunk_store import STORE_SUFFIX, ChunkStore, chunk_file_stem, open_chunk_store, save_chunk_store
+from .catalog import (
+    chunks_content_hash,
+    find_snapshot,
+    list_snapshots,
+    prune_snapshots,
+    register_snapshot,
+    update_snapshot_artifacts,
+)
 
-DATA_DIR = Path("data")
+
+# Resolved once, so catalog rows and saved paths do not depend on the working directory.
+DATA_DIR = Path(os.environ.get("AIHERO_DATA_DIR", "data")).resolve()
 DATA_DIR.mkdir(exist_ok=True)
+CATALOG_PATH = DATA_DIR / "catalog.sqlite"
+# owner_repo_branch_strategy_YYYYmmdd_HHMMSS_rand, anchored at both ends.
+_CHUNK_FILENAME = re.compile(
+    r"^(?P<owner>[^_]+)_(?P<repo>[^_]+)_(?P<branch>.+)_(?P<strategy>[a-z]+)"
+    r"_(?P<timestamp>\d{8}_\d{6})_(?P<rand>[0-9a-f]+)$"
+)
+CHUNK_FILE_PATTERNS = ("*.jsonl", "*.jsonl.gz", "*.jsonl.zst", f"*{STORE_SUFFIX}")
+
+
+def _chunk_filepath(owner: str, repo: str, branch: str, strategy: str, suffix: str) -> Path:
+    """Build DATA_DIR/owner_repo_branch_strategy_timestamp_rand<suffix>."""
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    rand = secrets.token_hex(2)
+    filename = f"{owner.lower()}_{repo.lower()}_{branch.lower()}_{strategy}_{ts}_{rand}{suffix}"
+    return DATA_DIR / filename
 
 
 def save_chunks_jsonl(
@@ -17,76 +49,317 @@ def save_chunks_jsonl(
     branch: str,
     strategy: str,
     ensure_ascii: bool = False,
+    params: Optional[Dict[str, Any]] = None,
+    compression: Optional[str] = None,
 ) -> Path:
     """
     Save chunks to JSONL with a structured filename:
-    owner_repo_branch_strategy_timestamp_rand.jsonl
+    owner_repo_branch_strategy_timestamp_rand.jsonl[.gz|.zst]
+    and record it in the snapshot catalog (with the chunking `params`).
+
+    `compression` is None, "gzip" or "zstd" (needs the `zstandard` package).
     """
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    rand = secrets.token_hex(2)
-    filename = f"{owner.lower()}_{repo.lower()}_{branch.lower()}_{strategy}_{ts}_{rand}.jsonl"
-    filepath = DATA_DIR / filename
+    suffixes = {None: "", **{name: suffix for suffix, name in COMPRESSION_SUFFIXES.items()}}
+    if compression not in suffixes:
+        raise ValueError(f"Unsupported compression: {compression}")
+    filepath = _chunk_filepath(owner, repo, branch, strategy, ".jsonl" + suffixes[compression])
 
-    with filepath.open("w", encoding="utf-8") as f_out:
-        for chunk in chunks:
-            json.dump(chunk, f_out, ensure_ascii=ensure_ascii)
-            f_out.write("\n")
+    # write_jsonl dict()-materializes compact Chunk views (see core.chunks.Chunk).
+    write_jsonl(chunks, filepath, ensure_ascii=ensure_ascii)
 
+    register_snapshot(CATALOG_PATH, filepath, owner, repo, branch, strategy, len(chunks),
+                      params=params, content_hash=chunks_content_hash(chunks))
     return filepath
 
 
+def iter_chunks_jsonl(filepath: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Stream chunks from a (possibly gzip/zstd-compressed) JSONL file.
+    """
+    return iter_jsonl(filepath)
+
+
 def load_chunks_jsonl(filepath: Path) -> List[Dict[str, Any]]:
     """
-    Load chunks from a JSONL file.
+    Load chunks from a (possibly gzip/zstd-compressed) JSONL file.
     """
-    chunks: List[Dict[str, Any]] = []
-    with filepath.open("r", encoding="utf-8") as f_in:
-        for line in f_in:
-            chunks.append(json.loads(line))
+    return list(iter_jsonl(filepath))
 
-    return chunks
 
+def save_chunks_store(
+    chunks: List[Dict[str, Any]],
+    owner: str,
+    repo: str,
+    branch: str,
+    strategy: str,
+    params: Optional[Dict[str, Any]] = None,
+) -> Path:
+    """
+    Save chunks to a binary columnar store (see utils.chunk_store) with a structured filename:
+    owner_repo_branch_strategy_timestamp_rand.chunks
+    and record it in the snapshot catalog (with the chunking `params`).
+    """
+    filepath = save_chunk_store(chunks, _chunk_filepath(owner, repo, branch, strategy, STORE_SUFFIX))
+    register_snapshot(CATALOG_PATH, filepath, owner, repo, branch, strategy, len(chunks),
+                      params=params, content_hash=chunks_content_hash(chunks))
+    return filepath
 
-def parse_chunk_filename(filename: str) -> Dict[str, str]:
+
+def load_chunks(filepath: Path) -> Union[ChunkStore, List[Dict[str, Any]]]:
+    """
+    Load saved chunks, memory-mapping `.chunks` stores and parsing anything else as JSONL.
     """
-    Parse a chunk filename into metadata.
+    filepath = Path(filepath)
+    if filepath.suffix == STORE_SUFFIX:
+        return open_chunk_store(filepath)
+    return load_chunks_jsonl(filepath)
 
-    Expected format:
-    owner_repo_branch_strategy_timestamp_rand.jsonl
+
+def _chunks_source(chunks_path: Path) -> Dict[str, Any]:
+    """Name, size and mtime of a chunks file, recorded by the artifacts derived from it."""
+    stat = Path(chunks_path).stat()
+    return {"name": Path(chunks_path).name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def embeddings_paths(chunks_path: Path) -> Tuple[Path, Path]:
+    """Return the (matrix, metadata) paths of the embeddings saved next to a chunks file."""
+    chunks_path = Path(chunks_path)
+    return chunks_path.with_suffix(".embeddings.npy"), chunks_path.with_suffix(".embeddings.json")
+
+
+def save_embeddings(embeddings: np.ndarray, chunks_path: Path, model_name: str) -> Path:
+    """
+    Save the embedding matrix of a chunks file next to it as float32 `.npy`,
+    stamped with the model name, dimension and the size/mtime of the chunks file
+    in a small JSON sidecar.
     """
-    base = Path(filename).stem
-    parts = base.split("_")
+    npy_path, meta_path = embeddings_paths(chunks_path)
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    tmp_path = npy_path.with_name(npy_path.name + ".tmp")
+    with tmp_path.open("wb") as f_out:
+        np.save(f_out, matrix)
+    os.replace(tmp_path, npy_path)
+
+    with meta_path.open("w", encoding="utf-8") as f_out:
+        json.dump({
+            "model": model_name,
+            "dim": matrix.shape[1],
+            "count": matrix.shape[0],
+            "source": _chunks_source(chunks_path),
+        }, f_out)
+    update_snapshot_artifacts(CATALOG_PATH, chunks_path, embeddings_path=npy_path)
+    return npy_path
+
+
+def load_embeddings(
+    chunks_path: Path,
+    model_name: str,
+    count: Optional[int] = None,
+) -> Optional[np.ndarray]:
+    """
+    Memory-map the embeddings saved next to a chunks file.
+
+    Returns None when there are none, or when they were made by a different model,
+    from a different version of the chunks file, or do not match `count` chunks,
+    so the caller falls back to encoding.
+    """
+    npy_path, meta_path = embeddings_paths(chunks_path)
+    if not npy_path.exists() or not meta_path.exists():
+        return None
+
+    with meta_path.open("r", encoding="utf-8") as f_in:
+        meta = json.load(f_in)
+    if meta.get("model") != model_name or meta.get("source") != _chunks_source(chunks_path):
+        return None
+
+    embeddings = np.load(npy_path, mmap_mode="r")
+    if embeddings.dtype != np.float32 or embeddings.shape != (meta["count"], meta["dim"]):
+        return None
+    if count is not None and embeddings.shape[0] != count:
+        return None
+    return embeddings
+
+
+def ann_index_path(chunks_path: Path) -> Path:
+    """Return the path of the IVF vector index saved next to a chunks file."""
+    return Path(chunks_path).with_suffix(".ivf.npz")
+
+
+def _ann_index_meta(chunks_path: Path, model_name: str) -> Dict[str, Any]:
+    # Tied to the exact embeddings file the lists were built from.
+    npy_path, _ = embeddings_paths(chunks_path)
+    stat = npy_path.stat() if npy_path.exists() else None
+    return {"model": model_name, "embeddings_mtime_ns": stat.st_mtime_ns if stat else None}
+
+
+def save_ann_index(index: Any, chunks_path: Path, model_name: str) -> Path:
+    """
+    Save a fitted `core.ann.IVFVectorSearch` (centroids and lists, not the vectors)
+    next to its chunks file. Save the embeddings first; the index is tied to them.
+    """
+    path = index.save(ann_index_path(chunks_path), **_ann_index_meta(chunks_path, model_name))
+    update_snapshot_artifacts(CATALOG_PATH, chunks_path, ann_index_path=path)
+    return path
 
-    if len(parts) < 6:
-        raise ValueError(f"Unexpected chunk filename format: {filename}")
 
+def load_ann_index(
+    chunks_path: Path,
+    embeddings: np.ndarray,
+    chunks: List[Dict[str, Any]],
+    model_name: str,
+    nprobe: Optional[int] = None,
+) -> Optional[Any]:
+    """
+    Load the IVF vector index saved next to a chunks file, searching `embeddings`.
+
+    Returns None when there is none, or when it was built for another model, other
+    embeddings or a different number of chunks.
+    """
+    from core.ann import IVFVectorSearch
+
+    return IVFVectorSearch.load(ann_index_path(chunks_path), embeddings, chunks, nprobe=nprobe,
+                                **_ann_index_meta(chunks_path, model_name))
+
+
+TEXT_INDEX_MAGIC = b"AIHTIDX1"
+TEXT_INDEX_VERSION = 1
+
+
+def text_index_path(chunks_path: Path) -> Path:
+    """Return the path of the text index saved next to a chunks file."""
+    return Path(chunks_path).with_suffix(".textindex.pkl")
+
+
+def _text_index_header(chunks_path: Path) -> Dict[str, Any]:
+    """Everything a saved text index must agree on to be reused."""
     return {
-        "owner": parts[0],
-        "repo": parts[1],
-        "branch": parts[2],
-        "strategy": parts[3],
-        "timestamp": parts[4],
-        "rand": parts[5],
+        "version": TEXT_INDEX_VERSION,
+        "minsearch": version("minsearch"),
+        "scikit-learn": version("scikit-learn"),
+        "source": _chunks_source(chunks_path),
     }
 
 
-def list_chunks() -> List[Dict[str, Any]]:
+def save_text_index(index: Any, chunks_path: Path) -> Path:
     """
-    List all saved chunk files with metadata.
+    Save a fitted minsearch.Index (vectorizers, sparse matrices, field config) next to
+    its chunks file. The chunks themselves are not stored again.
 
-    Returns:
-        List of dicts, each containing:
-        - path: Path to the file
-        - meta: Parsed metadata (owner, repo, branch, strategy, timestamp, rand)
+    The file starts with a JSON header recording the format, library versions and
+    the size/mtime of the chunks file, followed by the pickled index state.
+    """
+    path = text_index_path(chunks_path)
+    header = _text_index_header(chunks_path)
+    header["text_fields"] = list(index.text_fields)
+    header["keyword_fields"] = list(index.keyword_fields)
+    header_bytes = json.dumps(header).encode("utf-8")
+    state = {k: v for k, v in vars(index).items() if k != "docs"}
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as f_out:
+        f_out.write(TEXT_INDEX_MAGIC)
+        f_out.write(len(header_bytes).to_bytes(4, "little"))
+        f_out.write(header_bytes)
+        pickle.dump(state, f_out, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    update_snapshot_artifacts(CATALOG_PATH, chunks_path, text_index_path=path)
+    return path
+
+
+def load_text_index(
+    chunks_path: Path,
+    chunks: List[Dict[str, Any]],
+    text_fields: Optional[List[str]] = None,
+    keyword_fields: Optional[List[str]] = None,
+) -> Optional[Any]:
+    """
+    Load the text index saved next to a chunks file and attach `chunks` as its documents.
+
+    Returns None when there is none, or when it is stale: the chunks file changed, the
+    fields differ from the requested ones, or it was written by another minsearch /
+    scikit-learn version. Only load index files you created yourself (pickle).
+    """
+    from minsearch import Index
+
+    path = text_index_path(chunks_path)
+    if not path.exists():
+        return None
+
+    with path.open("rb") as f_in:
+        if f_in.read(len(TEXT_INDEX_MAGIC)) != TEXT_INDEX_MAGIC:
+            return None
+        header_len = int.from_bytes(f_in.read(4), "little")
+        header = json.loads(f_in.read(header_len))
+
+        expected = _text_index_header(chunks_path)
+        if any(header.get(k) != v for k, v in expected.items()):
+            return None
+        if text_fields is not None and header["text_fields"] != list(text_fields):
+            return None
+        if keyword_fields is not None and header["keyword_fields"] != list(keyword_fields):
+            return None
+        state = pickle.load(f_in)
+
+    index = Index.__new__(Index)
+    vars(index).update(state)
+    index.docs = chunks
+    return index
+
+
+def parse_chunk_filename(filename: str) -> Dict[str, str]:
+    """
+    Parse a chunk filename into metadata (only used to catalog files saved before
+    the snapshot catalog existed).
+
+    Expected format:
+    owner_repo_branch_strategy_date_time_rand.jsonl
+
+    Strategy, timestamp and random suffix are matched from the right, so branch names
+    may contain underscores. GitHub owners cannot contain underscores; the repo is
+    the next field (a repo name with underscores is read as part of the branch).
+    """
+    match = _CHUNK_FILENAME.match(chunk_file_stem(filename))
+    if match is None:
+        raise ValueError(f"Unexpected chunk filename format: {filename}")
+    return match.groupdict()
+
+
+def sync_catalog() -> None:
     """
-    results = []
-    for f in DATA_DIR.glob("*.jsonl"):
+    Reconcile the snapshot catalog with DATA_DIR: catalog chunk files saved without
+    it (metadata recovered from the filename) and drop rows whose file is gone.
+
+    Saving chunks registers them already, so this directory scan only runs on an
+    explicit refresh (`--refresh-catalog`, the app's refresh button).
+    """
+    prune_snapshots(CATALOG_PATH)
+    for f in sorted(f for pattern in CHUNK_FILE_PATTERNS for f in DATA_DIR.glob(pattern)):
+        if find_snapshot(CATALOG_PATH, f) is not None:
+            continue
         try:
             meta = parse_chunk_filename(f.name)
-            results.append({"path": f, "meta": meta})
+            created_at = datetime.strptime(meta["timestamp"], "%Y%m%d_%H%M%S").isoformat()
         except ValueError:
             continue
-    return results
+        register_snapshot(CATALOG_PATH, f, meta["owner"], meta["repo"], meta["branch"], meta["strategy"],
+                          len(load_chunks(f)), created_at=created_at)
+
+
+def list_chunks(**filters: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    List saved chunk snapshots from the catalog, newest first.
+
+    Args:
+        **filters: Optional owner, repo, branch and strategy to filter on.
+
+    Returns:
+        List of dicts, each containing:
+        - path: Path to the chunks file
+        - meta: Catalog row (id, created_at, owner, repo, branch, strategy, params,
+          chunk_count, content_hash, chunks/embeddings/text index paths)
+    """
+    return [{"path": snapshot["chunks_path"], "meta": snapshot} for snapshot in list_snapshots(CATALOG_PATH, **filters)]
 
 
 def load_yaml_config(path: str) -> Dict[str, Any]:
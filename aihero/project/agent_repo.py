@@ -2,8 +2,8 @@ import argparse
 from rich.console import Console
 from rich.markdown import Markdown
 
-from utils import load_chunks_jsonl
-from search import create_text_index, create_vector_index, load_embedding_model
+from utils import load_chunks, load_embeddings, save_embeddings, load_text_index, save_text_index
+from search import create_text_index, create_vector_index, load_embedding_model, DEFAULT_EMBEDDING_MODEL
 from agent_tools import make_agent_tools
 from agent import create_agent, run_agent
 
@@ -12,7 +12,7 @@ def parse_args():
     parser = argparse.ArgumentParser(
         description="Run an AI agent over chunked repository data"
     )
-    parser.add_argument("--chunks-file", required=True, help="Path to chunks.jsonl file")
+    parser.add_argument("--chunks-file", required=True, help="Path to chunks.jsonl or .chunks file")
     parser.add_argument("--query", required=True, help="User query to ask the agent")
     parser.add_argument("--prompt", default="prompts/system_prompt_strict.yml",
                         help="Path to system prompt YAML (default: prompts/system_prompt_strict.yml)")
@@ -32,13 +32,20 @@ def main():
 
     # 1. Load chunks
     with console.status("[bold cyan]Loading chunks...", spinner="dots"):
-        chunks = load_chunks_jsonl(args.chunks_file)
+        chunks = load_chunks(args.chunks_file)
 
     # 2. Build indexes
     with console.status("[bold cyan]Building indexes...", spinner="dots"):
-        text_index = create_text_index(chunks)
-        embedding_model = load_embedding_model()
-        vector_index = create_vector_index(chunks, embedding_model)
+        text_index = load_text_index(args.chunks_file, chunks)
+        if text_index is None:
+            text_index = create_text_index(chunks)
+            save_text_index(text_index, args.chunks_file)
+        embedding_model = load_embedding_model(DEFAULT_EMBEDDING_MODEL)
+        embeddings = load_embeddings(args.chunks_file, DEFAULT_EMBEDDING_MODEL, count=len(chunks))
+        vector_index = create_vector_index(chunks, embedding_model, embeddings=embeddings)
+        if embeddings is None:
+            # Saved next to the chunks file so the next run skips re-encoding.
+            save_embeddings(vector_index.vectors, args.chunks_file, DEFAULT_EMBEDDING_MODEL)
 
     # 3. Select tool(s)
     tools = make_agent_tools(text_index, vector_index, embedding_model)
@@ -1,9 +1,13 @@
-from typing import List, Dict, Any, Callable
-from minsearch import Index, VectorSearch
-from sentence_transformers import SentenceTransformer
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Dict, Any, Callable
 
 from search import text_search, vector_search, hybrid_search
 
+if TYPE_CHECKING:
+    from minsearch import Index, VectorSearch
+    from sentence_transformers import SentenceTransformer
+
 
 def make_agent_tools(
     text_index: Index,
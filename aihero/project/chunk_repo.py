@@ -1,10 +1,10 @@
 import argparse
 from pprint import pprint
-from tqdm import tqdm
 
 from read import read_repo_data
-from chunks import chunk_text
+from chunks import chunk_corpus
 from utils import save_chunks_jsonl
+from chunk_store import save_chunk_store
 
 
 def parse_args():
@@ -23,6 +23,8 @@ def parse_args():
     parser.add_argument("--size", type=int, default=2000, help="Chunk size (for simple/sliding)")
     parser.add_argument("--step", type=int, default=1000, help="Step size / overlap (for sliding)")
     parser.add_argument("--level", type=int, default=2, help="Section header level (for section)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes used for chunking (default: all cores; 1 disables multiprocessing)")
     parser.add_argument(
         "--save-json",
         nargs="?",
@@ -32,6 +34,14 @@ def parse_args():
              "If provided without a value, defaults to chunks.jsonl. "
              "If a string is provided, that string is used as the filename."
     )
+    parser.add_argument(
+        "--save-store",
+        nargs="?",
+        const=True,
+        default=False,
+        help="Save chunks to a binary columnar store that loads lazily via mmap. "
+             "If provided without a value, defaults to chunks.chunks."
+    )
     return parser.parse_args()
 
 
@@ -44,25 +54,24 @@ def main():
         return
 
     # Collect chunks from all docs
-    all_chunks = []
-    for doc in tqdm(docs, desc="Chunking docs"):
-        chunks = chunk_text(
-            doc.get("content", ""),
-            method=args.method,
-            size=args.size,
-            step=args.step,
-            level=args.level,
-            save_file=False,  # prevent per-doc saving
-        )
-        for c in chunks:
-            c["filename"] = doc.get("filename", "unknown")
-        all_chunks.extend(chunks)
+    all_chunks = chunk_corpus(
+        docs,
+        method=args.method,
+        size=args.size,
+        step=args.step,
+        level=args.level,
+        workers=args.workers,
+    )
 
     # Save once if requested
     if args.save_json:
         path = "chunks.jsonl" if args.save_json is True else args.save_json
         save_chunks_jsonl(all_chunks, path)
         print(f"\n💾 Saved {len(all_chunks)} chunks to {path}")
+    if args.save_store:
+        path = "chunks.chunks" if args.save_store is True else args.save_store
+        save_chunk_store(all_chunks, path)
+        print(f"\n💾 Saved {len(all_chunks)} chunks to {path}")
 
     # Preview only first document
     first_doc = docs[0]
@@ -0,0 +1,299 @@
+"""
+Binary columnar chunk store.
+
+A `.chunks` file keeps a chunk corpus in a layout that can be memory-mapped and
+read lazily, instead of parsing one JSON object per line:
+
+    magic (8 bytes) | header length (uint64 LE) | JSON header | aligned column blocks
+
+- The chunk texts are concatenated into one UTF-8 blob, addressed by an int64
+  array of byte offsets (n + 1 entries).
+- Integer fields present on every chunk (`start`, `end`) are stored as int64 arrays.
+- Every other field is dictionary-encoded: an int32 code per chunk (-1 = missing)
+  into a table of distinct JSON-encoded values (stored as offsets + blob as well).
+
+Opening a store only parses the small header and wraps the blocks with
+`np.frombuffer`; chunk texts and values are decoded on access.
+"""
+import json
+import mmap
+import operator
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from jsonl_io import iter_jsonl
+
+MAGIC = b"AIHCHNK1"
+STORE_SUFFIX = ".chunks"
+# Suffixes of chunk files, longest first (repo names may contain dots, e.g. next.js).
+CHUNK_FILE_SUFFIXES = (".jsonl.gz", ".jsonl.zst", ".jsonl", STORE_SUFFIX)
+_ALIGN = 64
+
+# Marks a field that a chunk does not have (distinct from an explicit None).
+_MISSING = object()
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _pack_strings(items: List[bytes]) -> tuple:
+    """Concatenate byte strings into (offsets, blob)."""
+    offsets = np.zeros(len(items) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in items], out=offsets[1:])
+    return offsets, b"".join(items)
+
+
+def save_chunk_store(
+    chunks: Iterable[Dict[str, Any]],
+    path: Union[str, Path],
+    text_field: str = "chunk",
+) -> Path:
+    """
+    Write chunks to a binary columnar `.chunks` file.
+
+    Args:
+        chunks: Chunks to save (dicts or Chunk views); every chunk needs `text_field`.
+        path: Output file path.
+        text_field: Field holding the chunk text.
+
+    Returns:
+        Path to the written file.
+    """
+    chunks = list(chunks)
+    path = Path(path)
+
+    keys: List[str] = []
+    for c in chunks:
+        for k in c.keys():
+            if k not in keys and k != text_field:
+                keys.append(k)
+
+    text_offsets, text_blob = _pack_strings([c[text_field].encode("utf-8") for c in chunks])
+    blocks: List[tuple] = [("text_offsets", text_offsets.tobytes()), ("text", text_blob)]
+    columns: Dict[str, Dict[str, Any]] = {}
+
+    for key in keys:
+        values = [c.get(key, _MISSING) for c in chunks]
+        if all(_is_int(v) for v in values):
+            columns[key] = {"kind": "int"}
+            blocks.append((f"col:{key}", np.asarray(values, dtype=np.int64).tobytes()))
+            continue
+
+        table: Dict[str, int] = {}
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, v in enumerate(values):
+            if v is _MISSING:
+                codes[i] = -1
+                continue
+            encoded = json.dumps(v, ensure_ascii=False)
+            codes[i] = table.setdefault(encoded, len(table))
+        value_offsets, value_blob = _pack_strings([s.encode("utf-8") for s in table])
+        columns[key] = {"kind": "dict", "size": len(table)}
+        blocks.append((f"col:{key}", codes.tobytes()))
+        blocks.append((f"values_offsets:{key}", value_offsets.tobytes()))
+        blocks.append((f"values:{key}", value_blob))
+
+    # Block positions are relative to the (aligned) end of the header.
+    layout: Dict[str, List[int]] = {}
+    pos = 0
+    for name, data in blocks:
+        layout[name] = [pos, len(data)]
+        pos += -(-len(data) // _ALIGN) * _ALIGN
+
+    header = json.dumps({
+        "version": 1,
+        "count": len(chunks),
+        "text_field": text_field,
+        "keys": [k for k in chunks[0].keys()] if chunks else [text_field],
+        "columns": columns,
+        "blocks": layout,
+    }).encode("utf-8")
+    prefix_len = len(MAGIC) + 8 + len(header)
+    padding = -prefix_len % _ALIGN
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as f_out:
+        f_out.write(MAGIC)
+        f_out.write(len(header).to_bytes(8, "little"))
+        f_out.write(header)
+        f_out.write(b"\0" * padding)
+        for _, data in blocks:
+            f_out.write(data)
+            f_out.write(b"\0" * (-len(data) % _ALIGN))
+    tmp_path.replace(path)
+    return path
+
+
+class ChunkStore(Sequence):
+    """
+    Read-only, memory-mapped view of a `.chunks` file.
+
+    Behaves like a list of chunk dicts: `len(store)`, `store[i]`, slicing and iteration
+    all work, and each access decodes only the requested chunk. Column accessors
+    (`texts`, `column`) avoid building dicts altogether.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a chunk store file: {self.path}")
+        header_len = int.from_bytes(self._mm[len(MAGIC):len(MAGIC) + 8], "little")
+        header_end = len(MAGIC) + 8 + header_len
+        header = json.loads(self._mm[len(MAGIC) + 8:header_end])
+        data_start = header_end + (-header_end % _ALIGN)
+
+        self.count: int = header["count"]
+        self.text_field: str = header["text_field"]
+        self._keys: List[str] = header["keys"]
+        self._columns: Dict[str, Dict[str, Any]] = header["columns"]
+        self._blocks = {name: (data_start + off, size) for name, (off, size) in header["blocks"].items()}
+
+        self._text_offsets = self._array("text_offsets", np.int64)
+        self._text_base = self._blocks["text"][0]
+        self._cols: Dict[str, np.ndarray] = {}
+        self._value_offsets: Dict[str, np.ndarray] = {}
+        self._value_cache: Dict[str, Dict[int, Any]] = {}
+        for key, spec in self._columns.items():
+            if spec["kind"] == "int":
+                self._cols[key] = self._array(f"col:{key}", np.int64)
+            else:
+                self._cols[key] = self._array(f"col:{key}", np.int32)
+                self._value_offsets[key] = self._array(f"values_offsets:{key}", np.int64)
+                self._value_cache[key] = {}
+
+    def _array(self, name: str, dtype: Any) -> np.ndarray:
+        offset, size = self._blocks[name]
+        return np.frombuffer(self._mm, dtype=dtype, count=size // np.dtype(dtype).itemsize, offset=offset)
+
+    def _text(self, i: int) -> str:
+        start, end = self._text_offsets[i], self._text_offsets[i + 1]
+        return self._mm[self._text_base + start:self._text_base + end].decode("utf-8")
+
+    def _value(self, key: str, i: int) -> Any:
+        column = self._cols[key]
+        if self._columns[key]["kind"] == "int":
+            return int(column[i])
+        code = int(column[i])
+        if code < 0:
+            return _MISSING
+        cache = self._value_cache[key]
+        if code not in cache:
+            offsets = self._value_offsets[key]
+            base = self._blocks[f"values:{key}"][0]
+            cache[code] = json.loads(self._mm[base + offsets[code]:base + offsets[code + 1]].decode("utf-8"))
+        value = cache[code]
+        # Hand out copies of mutable values so callers cannot corrupt the shared cache.
+        return list(value) if isinstance(value, list) else dict(value) if isinstance(value, dict) else value
+
+    def __reduce__(self):
+        # Pickle (and Streamlit cache hashing) by path; the mmap is reopened on load.
+        return (ChunkStore, (self.path,))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        i = operator.index(index)
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("chunk index out of range")
+
+        row: Dict[str, Any] = {}
+        for key in self._keys:
+            if key == self.text_field:
+                row[key] = self._text(i)
+            elif key in self._columns:
+                value = self._value(key, i)
+                if value is not _MISSING:
+                    row[key] = value
+        for key in self._columns:
+            if key not in row:
+                value = self._value(key, i)
+                if value is not _MISSING:
+                    row[key] = value
+        return row
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.count):
+            yield self[i]
+
+    def texts(self) -> Iterator[str]:
+        """Iterate over the chunk texts without building chunk dicts."""
+        for i in range(self.count):
+            yield self._text(i)
+
+    def column(self, key: str) -> List[Any]:
+        """Return all values of one field (None where missing)."""
+        if key == self.text_field:
+            return list(self.texts())
+        if key not in self._columns:
+            return [None] * self.count
+        if self._columns[key]["kind"] == "int":
+            return self._cols[key].tolist()
+        values = [self._value(key, i) for i in range(self.count)]
+        return [None if v is _MISSING else v for v in values]
+
+    def close(self) -> None:
+        # Drop the array views first; mmap refuses to close while buffers are exported.
+        self._text_offsets = None
+        self._cols.clear()
+        self._value_offsets.clear()
+        self._mm.close()
+
+    def __enter__(self) -> "ChunkStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def chunk_file_stem(path: Union[str, Path]) -> str:
+    """File name of a chunks file without its chunk-file suffix."""
+    name = Path(path).name
+    for suffix in CHUNK_FILE_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return Path(name).stem
+
+
+def open_chunk_store(path: Union[str, Path]) -> ChunkStore:
+    """Open a `.chunks` file for lazy, memory-mapped reading."""
+    return ChunkStore(path)
+
+
+def convert_jsonl_to_store(
+    jsonl_path: Union[str, Path],
+    store_path: Optional[Union[str, Path]] = None,
+    text_field: str = "chunk",
+) -> Path:
+    """
+    Convert an existing chunks JSONL file into a `.chunks` store.
+
+    Args:
+        jsonl_path: Source JSONL file (optionally gzip/zstd-compressed).
+        store_path: Output path (default: same name with the `.chunks` suffix).
+        text_field: Field holding the chunk text.
+
+    Returns:
+        Path to the written store.
+    """
+    jsonl_path = Path(jsonl_path)
+    store_path = Path(store_path) if store_path else jsonl_path.with_name(chunk_file_stem(jsonl_path) + STORE_SUFFIX)
+    return save_chunk_store(iter_jsonl(jsonl_path), store_path, text_field=text_field)
+
+
+if __name__ == "__main__":
+    # python chunk_store.py chunks.jsonl
+    for arg in sys.argv[1:]:
+        print(f"{arg} -> {convert_jsonl_to_store(arg)}")
@@ -1,5 +1,8 @@
+import os
 import re
-from typing import List, Dict, Any, Literal, Union
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Literal, Optional, Union
 from utils import save_chunks_jsonl
 
 def simple_chunking(text: str, size: int, save_file: Union[bool, str] = False) -> List[Dict[str, Any]]:
@@ -57,18 +60,21 @@ def paragraph_chunking(text: str, save_file: Union[bool, str] = False) -> List[D
 
 
 def markdown_section_chunking(text: str, level: int = 2, save_file: Union[bool, str] = False) -> List[Dict[str, Any]]:
-    header_pattern = r'^(#{' + str(level) + r'} )(.+)$'
-    pattern = re.compile(header_pattern, re.MULTILINE)
-    parts = pattern.split(text)
+    """
+    Split Markdown into sections starting at each header of the given level.
+
+    Header positions are collected in a single regex pass and every section is
+    sliced directly from `text`, so `text[start:end] == chunk` holds exactly.
+    Text before the first header is skipped; trailing whitespace is trimmed.
+    """
+    pattern = re.compile(r'^#{' + str(level) + r'} .+$', re.MULTILINE)
+    starts = [m.start() for m in pattern.finditer(text)]
 
     result: List[Dict[str, Any]] = []
-    for i in range(1, len(parts), 3):
-        header = (parts[i] + parts[i + 1]).strip()
-        content = parts[i + 2].strip() if i + 2 < len(parts) else ""
-        section = f"{header}\n\n{content}" if content else header
-        start = text.find(section)
-        end = start + len(section)
-        result.append({'start': start, 'end': end, 'chunk': section})
+    for i, start in enumerate(starts):
+        next_start = starts[i + 1] if i + 1 < len(starts) else len(text)
+        section = text[start:next_start].rstrip()
+        result.append({'start': start, 'end': start + len(section), 'chunk': section})
 
     if save_file:
         path = "chunks.jsonl" if isinstance(save_file, bool) else save_file
@@ -94,3 +100,84 @@ def chunk_text(
         return markdown_section_chunking(text, level, save_file)
     else:
         raise ValueError(f"Unknown method: {method}")
+
+
+def _balanced_batches(sizes: List[int], num_batches: int) -> List[List[int]]:
+    """
+    Greedily assign item indices to `num_batches` batches with similar total size.
+
+    Largest items are placed first, each into the currently lightest batch. Indices
+    inside each batch are sorted so results can be reassembled in input order.
+    """
+    heap = [(0, b) for b in range(num_batches)]
+    batches: List[List[int]] = [[] for _ in range(num_batches)]
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        load, b = heapq.heappop(heap)
+        batches[b].append(i)
+        heapq.heappush(heap, (load + sizes[i], b))
+    return [sorted(batch) for batch in batches if batch]
+
+
+def _chunk_batch(
+    texts: List[str],
+    method: str,
+    size: int,
+    step: int,
+    level: int,
+) -> List[List[Dict[str, Any]]]:
+    """Process pool task: chunk a batch of texts."""
+    return [chunk_text(text, method=method, size=size, step=step, level=level) for text in texts]
+
+
+def chunk_corpus(
+    docs: Iterable[Dict[str, Any]],
+    method: Literal["simple", "sliding", "paragraph", "section"],
+    size: int = 2000,
+    step: int = 1000,
+    level: int = 2,
+    workers: Optional[int] = None,
+    batches_per_worker: int = 4,
+) -> List[Dict[str, Any]]:
+    """
+    Chunk a whole corpus of documents, spreading the work across worker processes.
+
+    Documents are grouped into size-balanced batches (by content length) and chunked
+    in a process pool. Every chunk is tagged with its document's `filename`, and the
+    result keeps document order, exactly as a serial loop would.
+
+    Args:
+        docs: Parsed documents with `content` and `filename` keys.
+        method: Chunking method passed to `chunk_text`.
+        size: Chunk size (for simple/sliding).
+        step: Step size (for sliding).
+        level: Markdown header level (for section).
+        workers: Number of worker processes (default: os.cpu_count(); 1 chunks in-process).
+        batches_per_worker: Batches per worker, to smooth out uneven batch runtimes.
+
+    Returns:
+        List of chunk dicts with `start`, `end`, `chunk` and `filename`.
+    """
+    docs = list(docs)
+    texts = [doc.get("content", "") for doc in docs]
+
+    if workers == 1 or len(docs) < 2:
+        per_doc = _chunk_batch(texts, method, size, step, level)
+    else:
+        workers = workers or os.cpu_count() or 1
+        batches = _balanced_batches([len(t) for t in texts], min(len(docs), workers * batches_per_worker))
+        per_doc: List[List[Dict[str, Any]]] = [[] for _ in docs]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_chunk_batch, [texts[i] for i in batch], method, size, step, level)
+                for batch in batches
+            ]
+            for batch, future in zip(batches, futures):
+                for i, doc_chunks in zip(batch, future.result()):
+                    per_doc[i] = doc_chunks
+
+    all_chunks: List[Dict[str, Any]] = []
+    for doc, doc_chunks in zip(docs, per_doc):
+        for c in doc_chunks:
+            c["filename"] = doc.get("filename", "unknown")
+        all_chunks.extend(doc_chunks)
+    return all_chunks
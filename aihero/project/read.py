@@ -1,17 +1,63 @@
-import io
+import tempfile
 import zipfile
 import requests
 import frontmatter
 
+# Size of each block pulled from the HTTP response while streaming the archive.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Archives smaller than this stay in memory, larger ones roll over to a temp file on disk.
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+
+def download_repo_archive(url, chunk_size=DOWNLOAD_CHUNK_SIZE, spool_max_size=SPOOL_MAX_SIZE):
+    """
+    Streams a zip archive from `url` into a spooled temporary file.
+
+    The response body is consumed in `chunk_size` blocks, so the archive is never held in memory
+    as a single bytes object. Once more than `spool_max_size` bytes have been written, the spool
+    transparently moves to a temporary file on disk.
+
+    Args:
+        url (str): The archive download URL.
+        chunk_size (int): Number of bytes read from the response per iteration.
+        spool_max_size (int): In-memory threshold before the archive is spilled to disk.
+
+    Returns:
+        tempfile.SpooledTemporaryFile: A seekable file object positioned at the start of the archive.
+            The caller is responsible for closing it.
+
+    Raises:
+        Exception: If the repository cannot be downloaded (non-200 HTTP response).
+    """
+    with requests.get(url, stream=True) as response:
+        if response.status_code != 200:
+            raise Exception(f"Failed to download repository: {response.status_code}")
+
+        archive = tempfile.SpooledTemporaryFile(max_size=spool_max_size)
+        try:
+            for block in response.iter_content(chunk_size=chunk_size):
+                archive.write(block)
+        except Exception:
+            archive.close()
+            raise
+
+    archive.seek(0)
+    return archive
+
+
 def read_repo_data(repo_owner, repo_name, prefix="https://codeload.github.com", branch="main"):
     """
     Downloads and extracts Markdown (.md, .mdx) files from a GitHub repository's main branch zip archive,
     parses their frontmatter, and returns a list of dictionaries containing the parsed data and filenames.
 
+    The archive is streamed to a spooled temporary file and members are decompressed one at a time,
+    so peak memory depends on the largest Markdown file rather than on the size of the archive.
+
     Args:
         repo_owner (str): The owner of the GitHub repository.
         repo_name (str): The name of the GitHub repository.
         prefix (str): The URL prefix to construct the download link (e.g., "https://github.com").
+        branch (str): The branch to download (default: "main").
 
     Returns:
         list: A list of dictionaries, each containing the parsed frontmatter data and filename of a Markdown file.
@@ -21,29 +67,24 @@ def read_repo_data(repo_owner, repo_name, prefix="https://codeload.github.com",
     """
 
     url = f"{prefix}/{repo_owner}/{repo_name}/zip/refs/heads/{branch}"
-    response = requests.get(url)
-
-    if response.status_code != 200:
-        raise Exception(f"Failed to download repository: {response.status_code}")
 
     repository_data = []
-    zf = zipfile.ZipFile(io.BytesIO(response.content))
-    # Iterate through each file in the zip
-    for file_info in zf.infolist():
-        filename = file_info.filename.lower()
-        # Get md or mdx files only
-        if not (filename.endswith('.md') or filename.endswith('.mdx')):
-            continue
-        try:
-            # Read and parse each file
-            with zf.open(file_info) as f_in:
-                content = f_in.read().decode("utf-8", errors="ignore")
-                post = frontmatter.loads(content)
-                data = post.to_dict()
-                data['filename'] = filename
-                repository_data.append(data)
-        except Exception as e:
-            print(f"Error processing {filename}: {e}")
-            continue
-    zf.close()
+    with download_repo_archive(url) as archive, zipfile.ZipFile(archive) as zf:
+        # Iterate through each file in the zip
+        for file_info in zf.infolist():
+            filename = file_info.filename.lower()
+            # Get md or mdx files only
+            if not (filename.endswith('.md') or filename.endswith('.mdx')):
+                continue
+            try:
+                # Read and parse each file
+                with zf.open(file_info) as f_in:
+                    content = f_in.read().decode("utf-8", errors="ignore")
+                    post = frontmatter.loads(content)
+                    data = post.to_dict()
+                    data['filename'] = filename
+                    repository_data.append(data)
+            except Exception as e:
+                print(f"Error processing {filename}: {e}")
+                continue
     return repository_data
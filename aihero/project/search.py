@@ -1,8 +1,21 @@
-from typing import List, Dict, Any, Union
-from minsearch import Index, VectorSearch
-from sentence_transformers import SentenceTransformer
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Union
 import numpy as np
 
+# minsearch and sentence_transformers (torch) are slow to import; they are imported
+# where first used, so text-only searches never load torch.
+if TYPE_CHECKING:
+    from minsearch import Index, VectorSearch
+    from sentence_transformers import SentenceTransformer
+
+DEFAULT_EMBEDDING_MODEL = "multi-qa-distilbert-cos-v1"
+
+# Process-wide registry: each model is loaded once and shared.
+_models: Dict[str, SentenceTransformer] = {}
+_models_lock = threading.Lock()
+
 
 def create_text_index(
     chunks: List[Dict[str, Any]],
@@ -20,6 +33,8 @@ def create_text_index(
     Returns:
         Index: The created text index.
     """
+    from minsearch import Index
+
     index = Index(
         text_fields=text_fields,
         keyword_fields=keyword_fields,
@@ -27,9 +42,14 @@ def create_text_index(
     return index.fit(chunks)
 
 
-def load_embedding_model(model_name: str = "multi-qa-distilbert-cos-v1") -> SentenceTransformer:
-    """Load and return a SentenceTransformer embedding model."""
-    return SentenceTransformer(model_name)
+def load_embedding_model(model_name: str = DEFAULT_EMBEDDING_MODEL) -> SentenceTransformer:
+    """Return the SentenceTransformer embedding model, loading it once per process."""
+    with _models_lock:
+        if model_name not in _models:
+            from sentence_transformers import SentenceTransformer
+
+            _models[model_name] = SentenceTransformer(model_name)
+        return _models[model_name]
 
 
 def embed_text(
@@ -53,6 +73,7 @@ def create_vector_index(
     chunks: List[Dict[str, Any]],
     model: SentenceTransformer,
     text_field: str = "chunk",
+    embeddings: Optional[np.ndarray] = None,
 ) -> VectorSearch:
     """
     Create a vector index using minsearch.VectorSearch.
@@ -61,12 +82,17 @@ def create_vector_index(
         chunks: The data to be indexed.
         model: Preloaded SentenceTransformer model.
         text_field: Field of the chunk to embed.
+        embeddings: Precomputed embeddings aligned with `chunks` (e.g. memory-mapped
+            by `utils.load_embeddings`); skips encoding when given.
 
     Returns:
         VectorSearch object fitted with embeddings and chunks.
     """
-    texts = [c[text_field] for c in chunks]
-    embeddings = embed_text(texts, model)
+    if embeddings is None:
+        texts = [c[text_field] for c in chunks]
+        embeddings = embed_text(texts, model)
+    from minsearch import VectorSearch
+
     vindex = VectorSearch()
     vindex.fit(embeddings, chunks)
     return vindex
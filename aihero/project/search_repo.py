@@ -1,9 +1,10 @@
 import argparse
-from utils import load_chunks_jsonl
+from utils import load_chunks, load_embeddings, save_embeddings, load_text_index, save_text_index
 from search import (
     create_text_index,
     load_embedding_model,
     create_vector_index,
+    DEFAULT_EMBEDDING_MODEL,
     text_search,
     vector_search,
     hybrid_search,
@@ -12,7 +13,7 @@ from search import (
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Search chunks with text, vector, or hybrid mode")
-    parser.add_argument("--chunks-file", required=True, help="Path to chunks JSONL file")
+    parser.add_argument("--chunks-file", required=True, help="Path to chunks JSONL or .chunks file")
     parser.add_argument("--mode", choices=["text", "vector", "hybrid"], required=True, help="Search mode")
     parser.add_argument("--query", required=True, help="Search query string")
     parser.add_argument("--top-k", type=int, default=5, help="Number of results to return")
@@ -22,10 +23,21 @@ def parse_args():
 def main():
     args = parse_args()
 
-    chunks = load_chunks_jsonl(args.chunks_file)
-    text_index = create_text_index(chunks)
-    model = load_embedding_model()
-    vindex = create_vector_index(chunks, model)
+    chunks = load_chunks(args.chunks_file)
+
+    # Only build (or load) the indexes the selected mode needs.
+    if args.mode in ("text", "hybrid"):
+        text_index = load_text_index(args.chunks_file, chunks)
+        if text_index is None:
+            text_index = create_text_index(chunks)
+            save_text_index(text_index, args.chunks_file)
+    if args.mode in ("vector", "hybrid"):
+        model = load_embedding_model(DEFAULT_EMBEDDING_MODEL)
+        embeddings = load_embeddings(args.chunks_file, DEFAULT_EMBEDDING_MODEL, count=len(chunks))
+        vindex = create_vector_index(chunks, model, embeddings=embeddings)
+        if embeddings is None:
+            # Saved next to the chunks file so the next run skips re-encoding.
+            save_embeddings(vindex.vectors, args.chunks_file, DEFAULT_EMBEDDING_MODEL)
 
     if args.mode == "text":
         results = text_search(text_index, args.query, top_k=args.top_k)
@@ -1,24 +1,48 @@
+import os
 import json
+import pickle
 import yaml
-from typing import List, Dict, Any
+import numpy as np
+from importlib.metadata import version
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 
+from jsonl_io import iter_jsonl, write_jsonl
+from chunk_store import STORE_SUFFIX, ChunkStore, open_chunk_store
 
-def save_chunks_jsonl(chunks: List[Dict[str, Any]], filepath: str):
+
+def save_chunks_jsonl(chunks: List[Dict[str, Any]], filepath: str, ensure_ascii: bool = False):
     """
-    Save a list of chunks to a JSONL (JSON Lines) file.
+    Save a list of chunks to a JSONL (JSON Lines) file, streaming one line per chunk.
+
+    A `.gz` or `.zst` suffix compresses the file (zstd needs the `zstandard` package).
 
     Args:
         chunks (list): The data to be saved.
         filepath (str): The path to the output JSONL file.
+        ensure_ascii (bool): Escape non-ASCII characters.
+    """
+    write_jsonl(chunks, filepath, ensure_ascii=ensure_ascii)
+
+
+def iter_chunks_jsonl(filepath: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream chunks from a JSONL file, one dict at a time.
+
+    gzip/zstd compression is detected from the file contents.
+
+    Args:
+        filepath (str): The path to the JSONL file.
+
+    Returns:
+        iterator: The chunks, in file order.
     """
-    with open(filepath, 'w', encoding='utf-8') as f:
-        for chunk in chunks:
-            f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+    return iter_jsonl(filepath)
 
 
 def load_chunks_jsonl(filepath: str) -> List[Dict[str, Any]]:
     """
-    Load chunks from a JSONL (JSON Lines) file.
+    Load chunks from a (possibly gzip/zstd-compressed) JSONL (JSON Lines) file.
 
     Args:
         filepath (str): The path to the JSONL file.
@@ -26,8 +50,209 @@ def load_chunks_jsonl(filepath: str) -> List[Dict[str, Any]]:
     Returns:
         list: The loaded data from the JSONL file.
     """
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return [json.loads(line) for line in f.readlines()]
+    return list(iter_jsonl(filepath))
+
+
+def load_chunks(filepath: str) -> Union[ChunkStore, List[Dict[str, Any]]]:
+    """
+    Load chunks from a `.chunks` store (memory-mapped, read lazily) or a JSONL file.
+
+    Args:
+        filepath (str): The path to the `.chunks` or JSONL file.
+
+    Returns:
+        ChunkStore or list: The loaded chunks.
+    """
+    if filepath.endswith(STORE_SUFFIX):
+        return open_chunk_store(filepath)
+    return load_chunks_jsonl(filepath)
+
+
+def _chunks_source(chunks_path: str) -> Dict[str, Any]:
+    """Name, size and mtime of a chunks file, recorded by the artifacts derived from it."""
+    stat = Path(chunks_path).stat()
+    return {"name": Path(chunks_path).name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def embeddings_paths(chunks_path: str) -> Tuple[Path, Path]:
+    """
+    Return the paths of the embeddings saved next to a chunks file.
+
+    Args:
+        chunks_path (str): The path to the chunks file.
+
+    Returns:
+        tuple: (float32 `.npy` matrix path, JSON metadata path).
+    """
+    chunks_path = Path(chunks_path)
+    return chunks_path.with_suffix(".embeddings.npy"), chunks_path.with_suffix(".embeddings.json")
+
+
+def save_embeddings(embeddings: np.ndarray, chunks_path: str, model_name: str) -> Path:
+    """
+    Save the embedding matrix of a chunks file next to it as float32 `.npy`.
+
+    Args:
+        embeddings (np.ndarray): Embeddings aligned with the saved chunks.
+        chunks_path (str): The path to the chunks file.
+        model_name (str): Embedding model name, stamped into the metadata together with the
+            dimension and the size/mtime of the chunks file.
+
+    Returns:
+        Path: The path to the `.npy` file.
+    """
+    npy_path, meta_path = embeddings_paths(chunks_path)
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    tmp_path = npy_path.with_name(npy_path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        np.save(f, matrix)
+    os.replace(tmp_path, npy_path)
+
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "model": model_name,
+            "dim": matrix.shape[1],
+            "count": matrix.shape[0],
+            "source": _chunks_source(chunks_path),
+        }, f)
+    return npy_path
+
+
+def load_embeddings(chunks_path: str, model_name: str, count: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    Memory-map the embeddings saved next to a chunks file.
+
+    Args:
+        chunks_path (str): The path to the chunks file.
+        model_name (str): Embedding model the caller will query with.
+        count (int, optional): Expected number of chunks.
+
+    Returns:
+        np.ndarray or None: Read-only memory-mapped matrix, or None if missing, made by
+        another model or from another version of the chunks file, or not matching `count`.
+    """
+    npy_path, meta_path = embeddings_paths(chunks_path)
+    if not npy_path.exists() or not meta_path.exists():
+        return None
+
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get("model") != model_name or meta.get("source") != _chunks_source(chunks_path):
+        return None
+
+    embeddings = np.load(npy_path, mmap_mode="r")
+    if embeddings.dtype != np.float32 or embeddings.shape != (meta["count"], meta["dim"]):
+        return None
+    if count is not None and embeddings.shape[0] != count:
+        return None
+    return embeddings
+
+
+TEXT_INDEX_MAGIC = b"AIHTIDX1"
+TEXT_INDEX_VERSION = 1
+
+
+def text_index_path(chunks_path: str) -> Path:
+    """
+    Return the path of the text index saved next to a chunks file.
+
+    Args:
+        chunks_path (str): The path to the chunks file.
+
+    Returns:
+        Path: `<chunks>.textindex.pkl`.
+    """
+    return Path(chunks_path).with_suffix(".textindex.pkl")
+
+
+def _text_index_header(chunks_path: str) -> Dict[str, Any]:
+    """Everything a saved text index must agree on to be reused."""
+    return {
+        "version": TEXT_INDEX_VERSION,
+        "minsearch": version("minsearch"),
+        "scikit-learn": version("scikit-learn"),
+        "source": _chunks_source(chunks_path),
+    }
+
+
+def save_text_index(index: Any, chunks_path: str) -> Path:
+    """
+    Save a fitted minsearch.Index next to its chunks file, without the chunks themselves.
+
+    The file starts with a JSON header (format and library versions, size/mtime of
+    the chunks file, field config), followed by the pickled vectorizers and matrices.
+
+    Args:
+        index (minsearch.Index): The fitted index.
+        chunks_path (str): The path to the chunks file the index was fitted on.
+
+    Returns:
+        Path: The path to the saved index.
+    """
+    path = text_index_path(chunks_path)
+    header = _text_index_header(chunks_path)
+    header["text_fields"] = list(index.text_fields)
+    header["keyword_fields"] = list(index.keyword_fields)
+    header_bytes = json.dumps(header).encode("utf-8")
+    state = {k: v for k, v in vars(index).items() if k != "docs"}
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(TEXT_INDEX_MAGIC)
+        f.write(len(header_bytes).to_bytes(4, "little"))
+        f.write(header_bytes)
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_text_index(
+    chunks_path: str,
+    chunks: List[Dict[str, Any]],
+    text_fields: Optional[List[str]] = None,
+    keyword_fields: Optional[List[str]] = None,
+) -> Optional[Any]:
+    """
+    Load the text index saved next to a chunks file and attach `chunks` as its documents.
+
+    Only load index files you created yourself: the payload is a pickle.
+
+    Args:
+        chunks_path (str): The path to the chunks file.
+        chunks (list): The loaded chunks (same file).
+        text_fields (list, optional): Required text fields.
+        keyword_fields (list, optional): Required keyword fields.
+
+    Returns:
+        minsearch.Index or None: The index, or None if missing or stale (chunks file
+        changed, other fields, or another minsearch / scikit-learn version).
+    """
+    from minsearch import Index
+
+    path = text_index_path(chunks_path)
+    if not path.exists():
+        return None
+
+    with open(path, 'rb') as f:
+        if f.read(len(TEXT_INDEX_MAGIC)) != TEXT_INDEX_MAGIC:
+            return None
+        header_len = int.from_bytes(f.read(4), "little")
+        header = json.loads(f.read(header_len))
+
+        expected = _text_index_header(chunks_path)
+        if any(header.get(k) != v for k, v in expected.items()):
+            return None
+        if text_fields is not None and header["text_fields"] != list(text_fields):
+            return None
+        if keyword_fields is not None and header["keyword_fields"] != list(keyword_fields):
+            return None
+        state = pickle.load(f)
+
+    index = Index.__new__(Index)
+    vars(index).update(state)
+    index.docs = chunks
+    return index
 
 
 def load_yaml_config(path: str) -> Dict[str, Any]: